@@ -0,0 +1,92 @@
+"""
+Index des plages de disponibilité par personne.
+
+Pour chaque personne : intervalles [début, fin] (dates incluses) triés
+et fusionnés (chevauchants ou contigus), interrogés par bisect :
+- is_free(nom, début, fin)  : O(log I)
+- who_is_free(début, fin)   : O(P log I), dans l'ordre d'apparition
+  (iter_free : même chose, en générateur)
+"""
+
+import datetime
+from bisect import bisect_right
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+class IntervalIndex:
+
+    def __init__(self, intervals=()):
+        """intervals : itérable de (nom, début, fin)."""
+        by_name = {}
+        for name, start, end in intervals:
+            by_name.setdefault(name, []).append((start, end))
+
+        self._starts = {}
+        self._ends = {}
+        for name, ranges in by_name.items():
+            starts, ends = [], []
+            for start, end in sorted(ranges):
+                if ends and start <= ends[-1] + ONE_DAY:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[name] = starts
+            self._ends[name] = ends
+
+    @classmethod
+    def from_people(cls, people):
+        """Depuis des lignes `Person` (main.py), plusieurs par personne."""
+        return cls((p.name, p.start, p.end) for p in people)
+
+    @classmethod
+    def from_day_maps(cls, availability_by_user):
+        """
+        Depuis des cartes Firestore {email: {"AAAA-MM-JJ": True/False}} :
+        chaque suite de jours à True devient un intervalle.
+        """
+        def intervals():
+            for email, avail in availability_by_user.items():
+                days = sorted(
+                    datetime.date.fromisoformat(day)
+                    for day, value in avail.items() if value is True
+                )
+                if not days:
+                    continue
+                start = end = days[0]
+                for day in days[1:]:
+                    if day != end + ONE_DAY:
+                        yield email, start, end
+                        start = day
+                    end = day
+                yield email, start, end
+
+        index = cls(intervals())
+        # Conserver aussi les utilisateurs sans aucune disponibilité
+        for email in availability_by_user:
+            index._starts.setdefault(email, [])
+            index._ends.setdefault(email, [])
+        return index
+
+    @property
+    def names(self):
+        return list(self._starts)
+
+    def intervals(self, name):
+        return list(zip(self._starts.get(name, ()), self._ends.get(name, ())))
+
+    def is_free(self, name, start, end):
+        """True si `name` est disponible sur tout [start, end]."""
+        starts = self._starts.get(name)
+        if not starts:
+            return False
+        i = bisect_right(starts, start) - 1
+        return i >= 0 and self._ends[name][i] >= end
+
+    def iter_free(self, start, end):
+        """Comme who_is_free, mais paresseux (arrêt au premier candidat retenu)."""
+        return (name for name in self._starts if self.is_free(name, start, end))
+
+    def who_is_free(self, start, end):
+        return list(self.iter_free(start, end))
@@ -0,0 +1,149 @@
+"""
+Saisie en masse des disponibilités.
+
+Chaque opération est une fonction pure qui produit un diff
+{"AAAA-MM-JJ": True / False / None} limité au mois visé (None = effacer
+le jour). Le diff est appliqué en une fois à l'état de session puis
+enregistré en une seule écriture (save_availability(..., changed=...)).
+"""
+
+import csv
+import datetime
+import io
+
+from month_template import month_template
+
+TRUE_VALUES = {"1", "true", "vrai", "oui", "yes", "dispo", "x", "✅"}
+FALSE_VALUES = {"0", "false", "faux", "non", "no", "indispo", "❌"}
+
+
+# --------------------------------------------------------------
+# Diff
+# --------------------------------------------------------------
+def month_changes(year, month, proposed, current):
+    """
+    Ne garde de `proposed` ({date ou "AAAA-MM-JJ": état}) que les jours du
+    mois dont l'état diffère de `current`.
+    """
+    offsets = month_template(year, month).offsets
+    changes = {}
+    for day, state in proposed.items():
+        key = day if isinstance(day, str) else day.isoformat()
+        if key in offsets and current.get(key) is not state:
+            changes[key] = state
+    return changes
+
+
+def apply_changes(availability, changes):
+    """Applique un diff à un dictionnaire de disponibilités (en place)."""
+    for key, state in changes.items():
+        if state is None:
+            availability.pop(key, None)
+        else:
+            availability[key] = state
+    return availability
+
+
+# --------------------------------------------------------------
+# Opérations
+# --------------------------------------------------------------
+def range_days(start, end, state=True, within=None):
+    """
+    Tous les jours de start → end (inclus) ; within=(premier, dernier
+    jour) borne la plage avant de l'énumérer (ex. le mois cible).
+    """
+    if within is not None:
+        start, end = max(start, within[0]), min(end, within[1])
+    return {
+        start + datetime.timedelta(days=n): state
+        for n in range((end - start).days + 1)
+    }
+
+
+def block_days(year, month, block_type, state=True):
+    """Tous les jours des blocs `block_type` ("week" / "weekend") du mois."""
+    template = month_template(year, month)
+    return {
+        template.keys[offset]: state
+        for spec in template.blocks
+        if spec.type == block_type
+        for offset in range(spec.first, spec.last + 1)
+    }
+
+
+def copy_previous_month(year, month, previous):
+    """
+    Reprend le motif du mois précédent : le n-ième lundi (mardi, …) du mois
+    reçoit l'état du n-ième lundi du mois précédent. Les jours sans
+    équivalent (5e occurrence) sont effacés.
+    """
+    prev_year, prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+    by_occurrence = {}
+    for day in month_template(prev_year, prev_month).days:
+        state = previous.get(day.isoformat())
+        if state is not None:
+            by_occurrence[(day.weekday(), (day.day - 1) // 7)] = state
+
+    return {
+        day.isoformat(): by_occurrence.get((day.weekday(), (day.day - 1) // 7))
+        for day in month_template(year, month).days
+    }
+
+
+# --------------------------------------------------------------
+# Import de fichiers
+# --------------------------------------------------------------
+def csv_days(text, state=True, within=None):
+    """
+    Lit un CSV « date[,fin][,valeur] » (dates ISO, en-tête facultatif).
+    `valeur` : oui/non, 1/0, dispo/indispo… ; absente = `state`.
+    within : bornes (premier, dernier jour) des plages, cf. range_days.
+    """
+    days = {}
+    for row in csv.reader(io.StringIO(text)):
+        cells = [c.strip() for c in row if c.strip()]
+        if not cells:
+            continue
+        try:
+            start = datetime.date.fromisoformat(cells[0])
+        except ValueError:
+            continue  # en-tête ou ligne invalide
+
+        end, value = start, state
+        for cell in cells[1:]:
+            lowered = cell.lower()
+            if lowered in TRUE_VALUES:
+                value = True
+            elif lowered in FALSE_VALUES:
+                value = False
+            else:
+                end = datetime.date.fromisoformat(cell)
+
+        days.update(range_days(start, end, value, within))
+    return days
+
+
+def ics_days(data, state=False, within=None):
+    """
+    Jours couverts par les VEVENT d'un fichier iCal (absences, congés…),
+    tous marqués `state`. DTEND est exclusif ; les RRULE ne sont pas
+    développées. within : bornes des plages, cf. range_days.
+    """
+    from icalendar import Calendar
+
+    days = {}
+    for event in Calendar.from_ical(data).walk("VEVENT"):
+        start = event.decoded("DTSTART")
+        end = event.decoded("DTEND", None)
+
+        if isinstance(start, datetime.datetime):
+            last = end.date() if end else start.date()
+            if end and end.time() == datetime.time(0) and last > start.date():
+                last -= datetime.timedelta(days=1)
+            start = start.date()
+        else:
+            last = end - datetime.timedelta(days=1) if end else start
+
+        days.update(range_days(start, max(start, last), state, within))
+    return days
@@ -0,0 +1,200 @@
+"""
+Banc d'essai des solveurs de planning.
+
+    python -m benchmarks.bench_solvers --users 10 100 1000 --months 1 3
+    python -m benchmarks.bench_solvers --out bench.json --compare old.json
+
+Pour chaque (solveur, nb utilisateurs, nb mois) : temps total, pic
+mémoire (tracemalloc), taux de couverture (jours du mois affectés) et
+nombre d'alertes ; plus le temps d'import à froid des modules solveurs.
+Le JSON produit est comparable d'un commit à l'autre.
+"""
+
+import argparse
+import calendar
+import datetime as dt
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from benchmarks.workload import (
+    generate_availability, generate_people, generate_users, iter_months,
+)
+from planner_engine import generate_planning
+
+SOLVERS = ["greedy", "optimal", "script"]
+IMPORTS = ["main", "planner_engine"]
+
+
+def run_case(solver, n_users, n_months, *, year=2026, month=1, density=0.6, seed=0):
+    users = generate_users(n_users, seed=seed)
+    contract_hours = {email: info["contract_hours"] for email, info in users.items()}
+
+    wall = 0.0
+    peak = 0
+    days = covered = 0
+    warnings = 0
+
+    for y, m in iter_months(year, month, n_months):
+        if solver == "script":
+            solve_fn = _script_solver(users, y, m, seed)
+        else:
+            availability = generate_availability(users, y, m, density=density, seed=seed)
+            solve_fn = _engine_solver(solver, users, y, m, availability, contract_hours)
+
+        t0 = time.perf_counter()
+        month_covered, month_warnings = solve_fn()
+        wall += time.perf_counter() - t0
+
+        # Mémoire mesurée sur un second passage : tracemalloc fausse le temps
+        tracemalloc.start()
+        solve_fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        days += calendar.monthrange(y, m)[1]
+        covered += month_covered
+        if month_warnings is None:
+            warnings = None
+        else:
+            warnings += month_warnings
+
+    return {
+        "solver": solver,
+        "users": n_users,
+        "months": n_months,
+        "density": density,
+        "wall_s": round(wall, 6),
+        "peak_kib": round(peak / 1024, 1),
+        "coverage": round(covered / days, 4),
+        "warnings": warnings,
+    }
+
+
+def _engine_solver(solver, users, year, month, availability, contract_hours):
+    def run():
+        result = generate_planning(
+            year=year,
+            month=month,
+            users=users,
+            availability_by_user=availability,
+            contract_hours=contract_hours,
+            solver=solver,
+        )
+        covered = sum(b.days for b in result["blocks"] if b.assigned_to)
+        return covered, len(result["warnings"])
+
+    return run
+
+
+def _script_solver(users, year, month, seed):
+    """Solveur de main.py (pas d'alertes : warnings = None)."""
+    from main import solve
+
+    people = generate_people(users, year, month, seed=seed)
+
+    def run():
+        return len(solve(year, month, people).schedule), None
+
+    return run
+
+
+def measure_import(module, repeat=5):
+    """Temps d'import à froid (meilleur de `repeat` interpréteurs neufs)."""
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - t)"
+    )
+    best = min(
+        float(subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True, text=True, check=True,
+        ).stdout)
+        for _ in range(repeat)
+    )
+    return round(best, 6)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Affiche le ratio de temps par rapport à un JSON de référence."""
+    key = lambda r: (r["solver"], r["users"], r["months"], r["density"])
+    before = {key(r): r for r in baseline["results"]}
+
+    for r in results:
+        old = before.get(key(r))
+        if old is None or not old["wall_s"]:
+            continue
+        ratio = r["wall_s"] / old["wall_s"]
+        flag = "⚠️" if ratio > 1.2 else "  "
+        print(
+            f"{flag} {r['solver']:<8} users={r['users']:<6} months={r['months']:<3} "
+            f"x{ratio:5.2f}  coverage {old['coverage']:.3f} → {r['coverage']:.3f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--months", type=int, nargs="+", default=[1, 3, 12, 24])
+    parser.add_argument("--solvers", nargs="+", default=SOLVERS)
+    parser.add_argument("--density", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="fichier JSON de résultats")
+    parser.add_argument("--compare", help="JSON de référence à comparer")
+    args = parser.parse_args(argv)
+
+    results = []
+    for solver in args.solvers:
+        for n_users in args.users:
+            for n_months in args.months:
+                r = run_case(
+                    solver, n_users, n_months,
+                    density=args.density, seed=args.seed,
+                )
+                results.append(r)
+                print(
+                    f"{solver:<8} users={n_users:<6} months={n_months:<3} "
+                    f"{r['wall_s']:9.4f}s  {r['peak_kib']:10.1f} KiB  "
+                    f"coverage={r['coverage']:.3f}  warnings={r['warnings']}"
+                )
+
+    imports = {module: measure_import(module) for module in IMPORTS}
+    for module, seconds in imports.items():
+        print(f"import {module:<16} {seconds * 1000:8.2f} ms")
+
+    report = {
+        "imports_s": imports,
+        "meta": {
+            "commit": _git_commit(),
+            "date": dt.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
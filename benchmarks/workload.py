@@ -0,0 +1,78 @@
+"""
+Générateur de charge synthétique pour les solveurs de planning :
+utilisateurs, disponibilités (densité réglable), heures contrat et
+intervalles multiples par personne (format `Person` de main.py).
+"""
+
+import calendar
+import random
+
+from main import Person
+
+CONTRACT_HOURS = [0, 40, 70, 80, 120, 150]
+
+
+def month_days(year, month):
+    return [d for d in calendar.Calendar().itermonthdates(year, month) if d.month == month]
+
+
+def iter_months(year, month, count):
+    """(year, month) des `count` mois à partir de (year, month)."""
+    for _ in range(count):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def generate_users(n, *, sites=1, seed=0):
+    """{email: document utilisateur} au format de la collection `users`."""
+    rng = random.Random(seed)
+    return {
+        f"user{i:05d}@example.com": {
+            "name": f"User {i:05d}",
+            "admin": i == 0,
+            "contract_hours": rng.choice(CONTRACT_HOURS),
+            "site": f"site{i % sites:02d}",
+        }
+        for i in range(n)
+    }
+
+
+def generate_availability(users, year, month, *, density=0.6, seed=0):
+    """
+    {email: {"AAAA-MM-JJ": True/False}} : chaque jour est dispo avec la
+    probabilité `density`, sinon indispo ou non renseigné (moitié/moitié).
+    """
+    rng = random.Random(f"{seed}-{year}-{month}")
+    days = [d.isoformat() for d in month_days(year, month)]
+    availability = {}
+
+    for email in users:
+        avail = {}
+        for day in days:
+            r = rng.random()
+            if r < density:
+                avail[day] = True
+            elif r < density + (1 - density) / 2:
+                avail[day] = False
+        availability[email] = avail
+
+    return availability
+
+
+def generate_people(users, year, month, *, intervals=2, seed=0):
+    """
+    Liste de `Person` (plusieurs lignes par personne, comme Leila dans
+    main.py) : `intervals` plages de dispo aléatoires dans le mois.
+    """
+    rng = random.Random(f"{seed}-{year}-{month}-people")
+    days = month_days(year, month)
+    people = []
+
+    for email, info in users.items():
+        name = info.get("name", email)
+        for _ in range(intervals):
+            start = rng.randrange(len(days))
+            end = min(len(days) - 1, start + rng.randint(2, 14))
+            people.append(Person(name, days[start], days[end]))
+
+    return people
@@ -1,67 +1,232 @@
 import streamlit as st
 import calendar
+import time
 from typing import Dict
 
+import pandas as pd
 
-def availability_calendar(email: str, year: int, month: int, save_fn, load_fn):
+from availability_ops import (
+    apply_changes, block_days, copy_previous_month, csv_days, ics_days,
+    month_changes, range_days,
+)
+from components.calendar_grid import STATE_COLORS, WEEKDAYS, month_grid_html
+from instrumentation import instrumented
+from month_template import month_template
+
+PENDING_PREFIX = "pending_availability_"
+
+
+# Saisie en masse : une ligne par semaine, une colonne par jour
+STATE_LABELS = {True: "✅ Dispo", False: "❌ Indispo", None: "—"}
+LABEL_STATES = {label: state for state, label in STATE_LABELS.items()}
+
+BULK_OPERATIONS = {
+    "range": "📅 Plage de dates",
+    "week": "🗓️ Tous les blocs semaine (Lun → Jeu)",
+    "weekend": "🌙 Tous les week-ends (Ven → Dim)",
+    "copy": "📋 Copier le mois précédent",
+    "import": "📥 Importer un fichier CSV / iCal",
+}
+
+
+@instrumented("render")
+def availability_calendar(
+    email: str,
+    year: int,
+    month: int,
+    save_fn,
+    load_fn,
+    debounce_seconds: float = 20.0,
+):
 
     st.subheader(f"📆 {calendar.month_name[month]} {year}")
 
     session_key = f"availability_{email}_{year}_{month}"
+    pending_key = f"{PENDING_PREFIX}{email}_{year}_{month}"
+
+    # 💾 Modifications en attente restées inactives trop longtemps
+    flush_pending_availability(save_fn, load_fn, idle_seconds=debounce_seconds)
 
     if session_key not in st.session_state:
         st.session_state[session_key] = load_fn(email, year, month)
 
     availability: Dict[str, bool] = st.session_state[session_key]
 
-    cal = calendar.Calendar(firstweekday=0)
-    weeks = cal.monthdatescalendar(year, month)
+    # 🗓️ État du mois : un seul bloc HTML, rempli après la saisie
+    grid = st.empty()
+
+    # 🖱️ SAISIE (un seul widget, aucun rerun avant l'envoi du formulaire)
+    with st.form(key=f"form-{session_key}"):
+        edited = st.data_editor(
+            availability_frame(year, month, availability),
+            key=f"editor-{session_key}",
+            column_config={
+                day: st.column_config.SelectboxColumn(day, options=list(LABEL_STATES))
+                for day in WEEKDAYS
+            },
+            use_container_width=True,
+        )
+        submitted = st.form_submit_button("💾 Enregistrer")
+
+    if submitted:
+        changes = frame_changes(year, month, edited, availability)
+        if changes:
+            record_changes(email, year, month, changes)
+            if _flush(pending_key, save_fn, load_fn):
+                st.success("Disponibilités enregistrées")
+
+    # ⚡ SAISIE RAPIDE (une opération = un diff = une écriture)
+    with st.expander("⚡ Saisie rapide"):
+        template = month_template(year, month)
+        with st.form(key=f"bulk-{session_key}"):
+            operation = st.selectbox(
+                "Opération", list(BULK_OPERATIONS), format_func=BULK_OPERATIONS.get
+            )
+            state_label = st.radio("Marquer comme", list(LABEL_STATES), horizontal=True)
+            period = st.date_input(
+                "Plage de dates",
+                value=(template.first_day, template.last_day),
+                min_value=template.first_day,
+                max_value=template.last_day,
+            )
+            upload = st.file_uploader("Fichier CSV ou iCal", type=["csv", "ics"])
+            bulk = st.form_submit_button("⚡ Appliquer et enregistrer")
+
+    if bulk:
+        try:
+            proposed = _bulk_proposal(
+                operation, LABEL_STATES[state_label], email, year, month,
+                period, upload, load_fn,
+            )
+        except ValueError as e:
+            st.error(f"Saisie rapide impossible : {e}")
+            proposed = {}
+
+        changes = month_changes(year, month, proposed, st.session_state[session_key])
+        if not changes:
+            st.info("Aucun changement à enregistrer")
+        else:
+            record_changes(email, year, month, changes)
+            if _flush(pending_key, save_fn, load_fn):
+                st.success(f"{len(changes)} jour(s) enregistré(s)")
+
+    grid.markdown(
+        month_grid_html(year, month, {
+            d_key: ("", STATE_COLORS[state])
+            for d_key, state in st.session_state[session_key].items()
+            if state is not None
+        }),
+        unsafe_allow_html=True,
+    )
+
+    # 💾 Modifications en attente (saisies hors formulaire)
+    pending = st.session_state.get(pending_key)
+    if pending:
+        n = len(pending["days"])
+        st.caption(f"✏️ {n} modification(s) non enregistrée(s)")
+        if st.button("💾 Enregistrer", key=f"save-{pending_key}"):
+            if _flush(pending_key, save_fn, load_fn):
+                st.success("Disponibilités enregistrées")
+
+
+def _bulk_proposal(operation, state, email, year, month, period, upload, load_fn) -> dict:
+    template = month_template(year, month)
+    within = (template.first_day, template.last_day)  # plages bornées au mois
+
+    if operation == "range":
+        if len(period) != 2:
+            raise ValueError("choisissez une date de début et de fin")
+        return range_days(period[0], period[1], state, within)
+    if operation in ("week", "weekend"):
+        return block_days(year, month, operation, state)
+    if operation == "copy":
+        prev_year, prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
+        return copy_previous_month(year, month, load_fn(email, prev_year, prev_month))
+
+    if upload is None:
+        raise ValueError("aucun fichier sélectionné")
+    if upload.name.lower().endswith(".ics"):
+        return ics_days(upload.getvalue(), state, within)
+    return csv_days(upload.getvalue().decode("utf-8-sig"), state, within)
+
+
+def availability_frame(year: int, month: int, availability: dict) -> pd.DataFrame:
+    """Semaines × jours (Lun → Dim) ; None hors du mois."""
+    weeks = month_template(year, month).weeks
+    return pd.DataFrame(
+        [
+            [
+                STATE_LABELS[availability.get(day.isoformat())] if day.month == month else None
+                for day in week
+            ]
+            for week in weeks
+        ],
+        columns=list(WEEKDAYS),
+        index=[f"{week[0]:%d/%m} → {week[-1]:%d/%m}" for week in weeks],
+    )
+
+
+def frame_changes(year: int, month: int, frame: pd.DataFrame, availability: dict) -> dict:
+    """{"AAAA-MM-JJ": True/False/None} des jours modifiés dans l'éditeur."""
+    changes = {}
+    for week, row in zip(month_template(year, month).weeks, frame.itertuples(index=False)):
+        for day, label in zip(week, row):
+            if day.month != month or label not in LABEL_STATES:
+                continue  # hors mois, ou cellule vidée
+            d_key = day.isoformat()
+            state = LABEL_STATES[label]
+            if availability.get(d_key) is not state:
+                changes[d_key] = state
+    return changes
 
-    for week in weeks:
-        cols = st.columns(7)
-        for i, day in enumerate(week):
 
-            if day.month != month:
-                cols[i].markdown(
-                    f"<div style='opacity:0.3;text-align:center'>{day.day}</div>",
-                    unsafe_allow_html=True,
-                )
-                continue
+def record_changes(email: str, year: int, month: int, changes: dict):
+    """
+    Applique {"AAAA-MM-JJ": True/False/None} à l'état de session et les
+    ajoute aux modifications en attente (écriture différée).
+    """
+    session_key = f"availability_{email}_{year}_{month}"
+    pending_key = f"{PENDING_PREFIX}{email}_{year}_{month}"
+    apply_changes(st.session_state[session_key], changes)
+
+    pending = st.session_state.setdefault(pending_key, {
+        "email": email,
+        "year": year,
+        "month": month,
+        "days": set(),
+    })
+    pending["days"].update(changes)
+    pending["last_edit"] = time.time()
+
+
+def flush_pending_availability(save_fn, load_fn, idle_seconds: float = 0.0):
+    """
+    Écrit les modifications en attente de la session (un seul write par mois,
+    uniquement les jours modifiés). idle_seconds=0 : tout écrire, par
+    exemple avant la déconnexion.
+    """
+    now = time.time()
+    for key in [k for k in st.session_state if str(k).startswith(PENDING_PREFIX)]:
+        pending = st.session_state[key]
+        if now - pending["last_edit"] >= idle_seconds:
+            _flush(key, save_fn, load_fn)
+
+
+def _flush(pending_key: str, save_fn, load_fn) -> bool:
+    pending = st.session_state.pop(pending_key)
+    email, year, month = pending["email"], pending["year"], pending["month"]
+    session_key = f"availability_{email}_{year}_{month}"
+    availability = st.session_state.get(session_key, {})
 
-            d_key = day.isoformat()
+    try:
+        save_fn(email, year, month, availability, changed=pending["days"])
+    except PermissionError:
+        # 🔒 Mois verrouillé entre-temps : on recharge l'état serveur
+        st.session_state[session_key] = load_fn(email, year, month)
+        st.error(
+            f"🔒 Le planning {month:02d}/{year} a été verrouillé : "
+            "vos dernières modifications n'ont pas été enregistrées."
+        )
+        return False
 
-            # 🖱️ CLIC
-            if cols[i].button(f"{day.day}", key=f"{email}-{d_key}"):
-
-                current = availability.get(d_key)
-
-                if current is None:
-                    availability[d_key] = True
-                elif current is True:
-                    availability[d_key] = False
-                else:
-                    availability.pop(d_key)
-
-                save_fn(email, year, month, availability)
-
-            # ✅ LECTURE APRÈS MODIFICATION
-            state = availability.get(d_key)
-
-            if state is True:
-                color = "#00C853"   # vert
-            elif state is False:
-                color = "#D50000"   # rouge
-            else:
-                color = "#9E9E9E"   # gris
-
-            cols[i].markdown(
-                f"""
-                <div style="
-                    height:18px;
-                    margin-top:-28px;
-                    background:{color};
-                    border-radius:6px;
-                "></div>
-                """,
-                unsafe_allow_html=True,
-            )
\ No newline at end of file
+    return True
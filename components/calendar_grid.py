@@ -0,0 +1,100 @@
+import calendar
+import html
+
+from month_template import month_template
+
+# ================= GRILLES HTML (un seul rendu) =================
+# Le mois (ou la matrice équipe) est produit en une seule chaîne HTML,
+# affichée par un unique st.markdown : plus de st.columns / st.markdown
+# par jour. Les couleurs passent par des classes CSS pour garder une
+# page légère même à 100 personnes × plusieurs mois.
+
+WEEKDAYS = ("Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim")
+
+AVAILABLE = "#00C853"     # vert
+UNAVAILABLE = "#D50000"   # rouge
+UNKNOWN = "#9E9E9E"       # gris
+ASSIGNED = "#1976D2"      # bleu
+UNCOVERED = "#D32F2F"     # rouge
+
+STATE_COLORS = {True: AVAILABLE, False: UNAVAILABLE, None: UNKNOWN}
+
+_CSS = f"""
+<style>
+.pg-grid {{ border-collapse: separate; border-spacing: 4px; width: 100%; table-layout: fixed; }}
+.pg-grid th {{ text-align: center; font-size: 13px; font-weight: 600; }}
+.pg-grid td {{ border-radius: 8px; padding: 6px; text-align: center; color: white; font-size: 14px; }}
+.pg-grid td.out {{ opacity: 0.3; color: inherit; }}
+.pg-scroll {{ overflow-x: auto; max-height: 70vh; }}
+.pg-matrix {{ border-collapse: collapse; font-size: 11px; }}
+.pg-matrix th, .pg-matrix td {{ border: 1px solid rgba(128,128,128,0.25); padding: 0 2px; text-align: center; min-width: 18px; height: 18px; }}
+.pg-matrix th.name {{ text-align: left; padding: 0 6px; white-space: nowrap; }}
+.pg-matrix th.we {{ opacity: 0.6; }}
+.pg-matrix td.y {{ background: {AVAILABLE}; }}
+.pg-matrix td.n {{ background: {UNAVAILABLE}; }}
+</style>
+"""
+
+
+def month_grid_html(year: int, month: int, cells: dict) -> str:
+    """
+    Mois complet en un tableau Lun → Dim.
+    cells : {"AAAA-MM-JJ": (texte, couleur)} ; un jour absent est gris, sans texte.
+    """
+    template = month_template(year, month)
+    parts = [_CSS, "<table class='pg-grid'><tr>"]
+    parts.extend(f"<th>{d}</th>" for d in WEEKDAYS)
+    parts.append("</tr>")
+
+    for week in template.weeks:
+        parts.append("<tr>")
+        for day in week:
+            if day.month != month:
+                parts.append(f"<td class='out'>{day.day}</td>")
+                continue
+            text, color = cells.get(day.isoformat(), ("", UNKNOWN))
+            label = f"<br>{html.escape(str(text))}" if text else ""
+            parts.append(
+                f"<td style='background:{color}'><strong>{day.day}</strong>{label}</td>"
+            )
+        parts.append("</tr>")
+
+    parts.append("</table>")
+    return "".join(parts)
+
+
+def team_matrix_html(months: list, rows: list) -> str:
+    """
+    Matrice personnes × jours sur un ou plusieurs mois.
+    months : [(année, mois)] ; rows : [(nom, {"AAAA-MM-JJ": True/False})].
+    Vert = dispo, rouge = indispo, vide = non renseigné.
+    """
+    templates = [month_template(y, m) for y, m in months]
+
+    parts = [_CSS, "<div class='pg-scroll'><table class='pg-matrix'><thead><tr><th></th>"]
+    for t in templates:
+        parts.append(
+            f"<th colspan='{len(t.days)}'>{calendar.month_name[t.month]} {t.year}</th>"
+        )
+    parts.append("</tr><tr><th></th>")
+    for t in templates:
+        parts.extend(
+            f"<th class='we'>{d.day}</th>" if d.weekday() >= 5 else f"<th>{d.day}</th>"
+            for d in t.days
+        )
+    parts.append("</tr></thead><tbody>")
+
+    keys = [key for t in templates for key in t.keys]
+    for name, availability in rows:
+        parts.append(f"<tr><th class='name'>{html.escape(str(name))}</th>")
+        for key in keys:
+            state = availability.get(key)
+            parts.append(
+                "<td class='y'></td>" if state is True
+                else "<td class='n'></td>" if state is False
+                else "<td></td>"
+            )
+        parts.append("</tr>")
+
+    parts.append("</tbody></table></div>")
+    return "".join(parts)
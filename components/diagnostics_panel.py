@@ -0,0 +1,73 @@
+import json
+import os
+
+import pandas as pd
+import streamlit as st
+
+from instrumentation import begin_rerun, export_jsonl
+from planning_cache import get_planning_cache
+
+HISTORY_KEY = "diagnostics_history"
+MAX_HISTORY = 50
+
+
+def start_rerun_diagnostics(label: str = ""):
+    """
+    À appeler en tête de script : archive les mesures du rerun précédent
+    de la session (et les ajoute à $PLANNING_DIAGNOSTICS_LOG si défini),
+    puis démarre celles du rerun courant.
+    """
+    previous = st.session_state.get("_rerun_stats")
+    if previous is not None:
+        record = previous.to_dict()
+        history = st.session_state.setdefault(HISTORY_KEY, [])
+        history.append(record)
+        del history[:-MAX_HISTORY]
+
+        path = os.environ.get("PLANNING_DIAGNOSTICS_LOG")
+        if path:
+            export_jsonl([record], path)
+
+    st.session_state._rerun_stats = begin_rerun(label)
+
+
+def diagnostics_panel():
+    history = st.session_state.get(HISTORY_KEY, [])
+
+    with st.expander("🩺 Diagnostics (rerun précédent)"):
+        if not history:
+            st.caption("Aucune mesure pour l'instant.")
+            return
+
+        last = history[-1]
+        counters = last["counters"]
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Durée", f"{last['total_ms']:.0f} ms")
+        c2.metric("Lectures", counters.get("reads", 0))
+        c3.metric("Écritures", counters.get("writes", 0))
+        c4.metric("Cache", counters.get("cache_hits", 0))
+
+        cache = get_planning_cache().stats()
+        st.caption(
+            f"🧮 Cache plannings : {cache['hits'] + cache['disk_hits']} réutilisé(s) "
+            f"(dont {cache['disk_hits']} depuis le disque), {cache['misses']} calculé(s) — "
+            f"{cache['entries']} en mémoire, {cache['disk_bytes'] / 1024:.0f} Ko sur disque"
+        )
+
+        spans = pd.DataFrame(last["spans"])
+        if not spans.empty:
+            breakdown = (
+                spans.groupby(["category", "name"])["ms"]
+                .agg(appels="count", total_ms="sum")
+                .sort_values("total_ms", ascending=False)
+                .reset_index()
+            )
+            st.dataframe(breakdown, use_container_width=True, hide_index=True)
+
+        st.download_button(
+            "⬇️ Export JSON lines",
+            "\n".join(json.dumps(r, ensure_ascii=False) for r in history),
+            file_name="diagnostics.jsonl",
+            mime="application/jsonl",
+        )
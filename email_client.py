@@ -1,31 +1,165 @@
+import queue
 import smtplib
 import ssl
+import threading
+import time
 import toml
+from dataclasses import dataclass
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
-# Chargement des identifiants sécurisés
-creds = toml.load(".email_credentials.toml")
-EMAIL_ADDRESS = creds["EMAIL_ADDRESS"]
-APP_PASSWORD = creds["APP_PASSWORD"]
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+CREDENTIALS_FILE = ".email_credentials.toml"
 
-def send_email(to_email, subject, html_content):
-    """Envoie un email HTML sécurisé via SMTP Google."""
+# Chargement des identifiants sécurisés (au premier envoi, pas à l'import)
+_credentials = None
+
+
+def load_credentials():
+    global _credentials
+    if _credentials is None:
+        creds = toml.load(CREDENTIALS_FILE)
+        _credentials = (creds["EMAIL_ADDRESS"], creds["APP_PASSWORD"])
+    return _credentials
+
+
+@dataclass
+class SendResult:
+    to_email: str
+    ok: bool
+    attempts: int
+    error: str | None = None
+
+
+def build_message(from_email, to_email, subject, html_content):
     msg = MIMEMultipart("alternative")
-    msg["From"] = EMAIL_ADDRESS
+    msg["From"] = from_email
     msg["To"] = to_email
     msg["Subject"] = subject
 
     part = MIMEText(html_content, "html")
     msg.attach(part)
+    return msg
+
+
+def send_email(to_email, subject, html_content):
+    """Envoie un email HTML sécurisé via SMTP Google."""
+    result = send_bulk([(to_email, subject, html_content)], connections=1)[0]
+    if not result.ok:
+        print("❌ Email error:", result.error)
+    return result.ok
+
+
+def send_bulk(
+    messages,
+    *,
+    host=SMTP_HOST,
+    port=SMTP_PORT,
+    use_ssl=True,
+    credentials=None,
+    connections=3,
+    max_per_connection=100,
+    max_retries=3,
+    backoff=1.0,
+):
+    """
+    Envoie une liste de (to_email, subject, html_content) en réutilisant
+    au plus `connections` connexions authentifiées (une par worker),
+    renouvelées toutes les `max_per_connection` messages.
+
+    Erreurs temporaires (déconnexion, réseau, codes 4xx) : nouvelle
+    connexion puis nouvel essai, avec attente exponentielle
+    (backoff, 2×backoff, ...). Erreurs définitives (5xx) : pas de nouvel
+    essai. Erreur définitive à la connexion ou à l'authentification
+    (ex. 535, identifiants refusés) : tous les workers s'arrêtent et les
+    messages restants sont en échec avec cette erreur, sans autre
+    tentative de connexion. Retourne un SendResult par message, dans
+    l'ordre d'entrée.
+    """
+    messages = list(messages)
+    from_email, password = credentials or load_credentials()
+    results = [None] * len(messages)
+
+    jobs = queue.Queue()
+    for i in range(len(messages)):
+        jobs.put(i)
+    fatal = []  # erreur de connexion définitive : arrêt de tous les workers
+
+    def connect():
+        if use_ssl:
+            server = smtplib.SMTP_SSL(host, port, context=ssl.create_default_context())
+        else:
+            server = smtplib.SMTP(host, port)
+        if password is not None:
+            server.login(from_email, password)
+        return server
+
+    def close(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def worker():
+        server, sent = None, 0
+
+        while not fatal:
+            try:
+                i = jobs.get_nowait()
+            except queue.Empty:
+                break
+
+            to_email, subject, html_content = messages[i]
+            msg = build_message(from_email, to_email, subject, html_content).as_string()
+
+            for attempt in range(1, max_retries + 2):
+                connecting = False
+                try:
+                    if server is None or sent >= max_per_connection:
+                        if server is not None:
+                            close(server)
+                            server = None
+                        connecting = True
+                        server, sent = connect(), 0
+                        connecting = False
+                    server.sendmail(from_email, to_email, msg)
+                    sent += 1
+                    results[i] = SendResult(to_email, True, attempt)
+                    break
+                except Exception as e:
+                    if connecting and not _is_transient(e):
+                        fatal.append(repr(e))
+                    if not _is_transient(e) or attempt > max_retries:
+                        results[i] = SendResult(to_email, False, attempt, repr(e))
+                        break
+                    if server is not None:
+                        server.close()
+                        server = None
+                    time.sleep(backoff * 2 ** (attempt - 1))
+
+        if server is not None:
+            close(server)
+
+    threads = [
+        threading.Thread(target=worker, daemon=True)
+        for _ in range(max(1, min(connections, len(messages))))
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i, result in enumerate(results):
+        if result is None:  # non tenté après une erreur de connexion définitive
+            results[i] = SendResult(messages[i][0], False, 0, fatal[0])
+
+    return results
 
-    context = ssl.create_default_context()
 
-    try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-            server.login(EMAIL_ADDRESS, APP_PASSWORD)
-            server.sendmail(EMAIL_ADDRESS, to_email, msg.as_string())
-        return True
-    except Exception as e:
-        print("❌ Email error:", e)
-        return False
\ No newline at end of file
+def _is_transient(error):
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
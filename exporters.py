@@ -0,0 +1,148 @@
+"""
+Exports du planning (CSV / iCal / XLSX) en flux : les lignes sont
+produites par des générateurs et écrites au fil de l'eau, la mémoire
+reste constante quel que soit l'horizon.
+
+Une ligne = (date, personne, bloc), un jour travaillé.
+"""
+
+import contextlib
+import csv
+import datetime
+import uuid
+from pathlib import Path
+
+BLOCK_LABELS = {"week": "B1", "weekend": "B2"}
+HEADER = ["Date", "Jour", "Personne", "Bloc"]
+DAY_START = datetime.time(9, 0)
+DAY_HOURS = 10
+
+
+# --------------------------------------------------------------
+# Sources de lignes
+# --------------------------------------------------------------
+def block_rows(blocks, names=None):
+    """Lignes des blocs affectés (names : {email: nom affiché})."""
+    names = names or {}
+    for block in blocks:
+        if block.assigned_to is None:
+            continue
+        person = names.get(block.assigned_to, block.assigned_to)
+        label = BLOCK_LABELS.get(block.type, block.type)
+        for i in range(block.days):
+            yield block.start + datetime.timedelta(days=i), person, label
+
+
+def schedule_rows(schedule):
+    """Lignes d'un planning {date: (personne, bloc)} (format de main.py)."""
+    for d in sorted(schedule):
+        person, blk = schedule[d]
+        yield d, person, blk
+
+
+def locked_rows(months, load_fn=None, names=None):
+    """
+    Lignes des plannings verrouillés pour une suite de (year, month),
+    chargés un mois à la fois (load_fn : load_locked_planning).
+    """
+    from planning_blocks import unpack_blocks
+
+    if load_fn is None:
+        from firebase_client import load_locked_planning as load_fn
+
+    for year, month in months:
+        planning = load_fn(year, month)
+        if planning:
+            yield from block_rows(unpack_blocks(planning["blocks"]), names)
+
+
+@contextlib.contextmanager
+def _open_text(target):
+    if isinstance(target, (str, Path)):
+        with open(target, "w", newline="", encoding="utf-8") as f:
+            yield f
+    else:
+        yield target
+
+
+# --------------------------------------------------------------
+# CSV
+# --------------------------------------------------------------
+def write_csv(rows, target):
+    """Écrit les lignes dans un chemin ou un fichier texte ; retourne le nombre."""
+    count = 0
+    with _open_text(target) as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for d, person, blk in rows:
+            writer.writerow([d.isoformat(), d.strftime("%A"), person, blk])
+            count += 1
+    return count
+
+
+# --------------------------------------------------------------
+# iCal
+# --------------------------------------------------------------
+def iter_ical(rows, dtstamp=None):
+    """
+    Lignes iCalendar, un VEVENT par jour travaillé. DTSTAMP est calculé
+    une seule fois ; l'UID est stable (date + personne + bloc), un nouvel
+    export met donc à jour les événements au lieu de les dupliquer.
+    """
+    dtstamp = dtstamp or datetime.datetime.now(datetime.timezone.utc)
+    stamp = dtstamp.strftime("%Y%m%dT%H%M%SZ")
+
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield "PRODID:-//Lumo Scheduler//EN"
+
+    for d, person, blk in rows:
+        start_dt = datetime.datetime.combine(d, DAY_START)
+        end_dt = start_dt + datetime.timedelta(hours=DAY_HOURS)
+        uid = uuid.uuid5(uuid.NAMESPACE_URL, f"planning:{d.isoformat()}:{person}:{blk}")
+        yield "BEGIN:VEVENT"
+        yield f"UID:{uid}"
+        yield f"DTSTAMP:{stamp}"
+        yield f"DTSTART:{start_dt.strftime('%Y%m%dT%H%M%S')}"
+        yield f"DTEND:{end_dt.strftime('%Y%m%dT%H%M%S')}"
+        yield f"SUMMARY:{person} – {blk}"
+        yield "END:VEVENT"
+
+    yield "END:VCALENDAR"
+
+
+def write_ical(rows, target, dtstamp=None):
+    with _open_text(target) as f:
+        for line in iter_ical(rows, dtstamp):
+            f.write(line)
+            f.write("\r\n")
+
+
+# --------------------------------------------------------------
+# XLSX
+# --------------------------------------------------------------
+def write_xlsx(rows, target):
+    """
+    Classeur XLSX en mode `constant_memory` de xlsxwriter : chaque ligne
+    est écrite sur disque dès que la suivante commence.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(target, {"constant_memory": True})
+    sheet = workbook.add_worksheet("Planning")
+    bold = workbook.add_format({"bold": True})
+    date_fmt = workbook.add_format({"num_format": "dd/mm/yyyy"})
+
+    sheet.write_row(0, 0, HEADER, bold)
+    sheet.set_column(0, 0, 12)
+    sheet.set_column(1, 2, 16)
+
+    count = 0
+    for count, (d, person, blk) in enumerate(rows, start=1):
+        sheet.write_datetime(count, 0, datetime.datetime.combine(d, datetime.time()), date_fmt)
+        sheet.write_string(count, 1, d.strftime("%A"))
+        sheet.write_string(count, 2, person)
+        sheet.write_string(count, 3, blk)
+
+    workbook.close()
+    return count
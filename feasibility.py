@@ -0,0 +1,142 @@
+"""
+Analyse de faisabilité de la couverture, avant toute résolution.
+
+Pour un mois et des disponibilités, sans lancer de solveur :
+- les blocs sans aucun candidat (personne disponible sur tout le bloc) ;
+- la couverture maximale atteignable en respectant la règle « pas deux
+  blocs consécutifs » (max_coverage, exacte : c'est la seule contrainte
+  entre blocs) ;
+- pour chaque bloc qui resterait non couvert, les personnes à relancer :
+  celles à qui il manque le moins de jours pour le rendre couvrable.
+
+    from feasibility import analyze_coverage
+    report = analyze_coverage(2026, 3, availability_by_user)
+    report.max_covered, report.no_candidate, report.gaps
+
+Coût linéaire en (blocs × utilisateurs) : assez rapide pour chaque rerun.
+"""
+
+from dataclasses import dataclass, field
+
+from instrumentation import timed
+from month_template import month_template
+from planner_engine import build_availability_index, eligible_candidates, max_coverage
+
+MAX_FIXES = 3
+
+
+@dataclass
+class GapFix:
+    email: str
+    days: list             # jours ("AAAA-MM-JJ") à rendre disponibles
+    unavailable: int = 0   # parmi eux, jours déclarés indisponibles
+
+
+@dataclass
+class Gap:
+    block: int             # indice dans month_template(...).blocks
+    candidates: list       # personnes éligibles, prises par un bloc voisin
+    fixes: list = field(default_factory=list)
+
+
+@dataclass
+class CoverageReport:
+    year: int
+    month: int
+    blocks: int
+    max_covered: int
+    candidates: list       # nombre de candidats par bloc
+    no_candidate: list     # indices des blocs sans candidat
+    gaps: list             # [Gap] : blocs non couverts par la meilleure affectation
+
+    @property
+    def feasible(self) -> bool:
+        return self.max_covered == self.blocks
+
+
+def analyze_coverage(year: int, month: int, availability_by_user: dict, max_fixes: int = MAX_FIXES) -> CoverageReport:
+    """
+    Couverture atteignable du mois et, pour chaque bloc qui resterait non
+    couvert, jusqu'à `max_fixes` personnes à relancer (le moins de jours
+    manquants d'abord, puis le moins de jours déclarés indisponibles).
+    Chaque correction proposée ajoute à elle seule un bloc couvert.
+    """
+    with timed("solver", "feasibility"):
+        template = month_template(year, month)
+        masks = [spec.mask for spec in template.blocks]
+        available = build_availability_index(year, month, availability_by_user)
+        unavailable = _unavailable_index(template, availability_by_user)
+
+        eligible = eligible_candidates(masks, available)
+        assignment = max_coverage(eligible)
+        max_covered = sum(email is not None for email in assignment)
+
+        gaps = []
+        for b, email in enumerate(assignment):
+            if email is not None:
+                continue
+            gaps.append(Gap(
+                block=b,
+                candidates=list(eligible[b]),
+                fixes=_best_fixes(
+                    template, masks, b, eligible, assignment, max_covered,
+                    available, unavailable, max_fixes,
+                ),
+            ))
+
+    return CoverageReport(
+        year=year,
+        month=month,
+        blocks=len(masks),
+        max_covered=max_covered,
+        candidates=[len(c) for c in eligible],
+        no_candidate=[b for b, c in enumerate(eligible) if not c],
+        gaps=gaps,
+    )
+
+
+def _unavailable_index(template, availability_by_user):
+    # {email: masque des jours déclarés indisponibles}
+    index = {}
+    for email, avail in availability_by_user.items():
+        mask = 0
+        for day, value in avail.items():
+            offset = template.offsets.get(day)
+            if value is False and offset is not None:
+                mask |= 1 << offset
+        index[email] = mask
+    return index
+
+
+def _best_fixes(template, masks, b, eligible, assignment, max_covered, available, unavailable, limit):
+    ranked = []
+    for email, mask in available.items():
+        if email in eligible[b]:
+            continue
+        missing = masks[b] & ~mask
+        ranked.append((
+            missing.bit_count(),
+            (missing & unavailable[email]).bit_count(),
+            email,
+            missing,
+        ))
+    ranked.sort(key=lambda r: r[:2])
+
+    # Une personne hors des blocs voisins couvre ce bloc sans rien déplacer.
+    # Un voisin affecté n'aide que si une autre affectation optimale le
+    # libère : on le vérifie (deux voisins au plus par bloc).
+    neighbours = {assignment[i] for i in (b - 1, b + 1) if 0 <= i < len(assignment)}
+    fixes = []
+    for _, n_unavailable, email, missing in ranked:
+        if len(fixes) == limit:
+            break
+        if email in neighbours:
+            extended = eligible[:b] + [eligible[b] + [email]] + eligible[b + 1:]
+            if sum(u is not None for u in max_coverage(extended)) <= max_covered:
+                continue
+        fixes.append(GapFix(
+            email=email,
+            days=[day.isoformat() for i, day in enumerate(template.days) if missing >> i & 1],
+            unavailable=n_unavailable,
+        ))
+    return fixes
@@ -1,42 +1,182 @@
-import firebase_admin
-from firebase_admin import credentials, auth, firestore
+import datetime
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+
 import streamlit as st
 
-# ================= FIREBASE INIT =================
-if not firebase_admin._apps:
-    firebase_config = {
-        "type": st.secrets["firebase"]["type"],
-        "project_id": st.secrets["firebase"]["project_id"],
-        "private_key_id": st.secrets["firebase"]["private_key_id"],
-        "private_key": st.secrets["firebase"]["private_key"],
-        "client_email": st.secrets["firebase"]["client_email"],
-        "client_id": st.secrets["firebase"]["client_id"],
-        "auth_uri": st.secrets["firebase"]["auth_uri"],
-        "token_uri": st.secrets["firebase"]["token_uri"],
-        "auth_provider_x509_cert_url": st.secrets["firebase"]["auth_provider_x509_cert_url"],
-        "client_x509_cert_url": st.secrets["firebase"]["client_x509_cert_url"],
+from instrumentation import count, instrumented, timed
+from storage import create_backend
+from storage.async_backend import async_backend_for, load_admin_bundle as _load_admin_bundle, run
+from storage.replica import AvailabilityReplica
+
+# ================= STORAGE =================
+# Firestore par défaut ; $PLANNING_STORAGE="sqlite:///planning.db" pour
+# travailler hors ligne sur une base locale. Connexion à la première
+# utilisation, pas à l'import.
+_backend = None
+_async_backend = None
+_replica = None
+_replica_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Remplace le backend de stockage (et vide le cache de lecture)."""
+    global _backend, _async_backend, _replica
+    with _replica_lock:
+        if _replica is not None:
+            _replica.stop()
+        _replica = None
+    _backend = backend
+    _async_backend = None
+    clear_cache()
+
+
+def get_async_backend():
+    """Variante asynchrone du backend courant (lectures concurrentes)."""
+    global _async_backend
+    if _async_backend is None:
+        _async_backend = async_backend_for(get_backend())
+    return _async_backend
+
+
+# ================= RÉPLICA =================
+# Utilisateurs et disponibilités servis depuis une réplica mémoire du
+# processus, tenue à jour par écoute Firestore (ou journal SQLite) :
+# plus de relecture de toute l'équipe à chaque interaction.
+# $PLANNING_REPLICA=0 pour lire directement le stockage.
+def get_replica():
+    global _replica
+    if os.environ.get("PLANNING_REPLICA", "1") == "0":
+        return None
+    with _replica_lock:
+        if _replica is None:
+            _replica = AvailabilityReplica(get_backend()).start()
+        return _replica
+
+
+def replica_status():
+    """{"mode", "staleness", "events"} de la réplica, ou None si désactivée."""
+    replica = get_replica()
+    if replica is None:
+        return None
+    return {
+        "mode": replica.mode,
+        "staleness": replica.staleness(),
+        "events": replica.events,
     }
 
-    cred = credentials.Certificate(firebase_config)
-    firebase_admin.initialize_app(cred)
 
-db = firestore.client()
-USERS = db.collection("users")
-LOCKS = db.collection("planning_locks")
-PLANNINGS = db.collection("plannings")
+# ================= CACHE =================
+# Streamlit réexécute tout le script à chaque interaction : les lectures
+# les plus fréquentes sont mises en cache (TTL par fonction, partagé entre
+# sessions) et invalidées explicitement par les écritures qui les touchent.
+# Les valeurs en cache sont partagées : ne pas les modifier.
+class _TTLCache:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits[key[0]] += 1
+                return True, entry[1]
+            self.misses[key[0]] += 1
+            return False, None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, name, args=None):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == name]:
+                if args is None or key[1] == args:
+                    del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = _TTLCache()
+
+
+def _cached(ttl):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args):
+            key = (fn.__name__, args)
+            hit, value = _cache.get(key)
+            if hit:
+                count("cache_hits")
+                return value
+            value = fn(*args)
+            _cache.set(key, value, ttl)
+            return value
+        wrapper.cache_ttl = ttl
+        return wrapper
+    return decorator
+
+
+def invalidate_cache(name, *args):
+    """Invalide les entrées d'une fonction (toutes, ou celles de ces arguments)."""
+    _cache.invalidate(name, args or None)
+
+
+def _cache_lookup(fn, *args):
+    """(trouvé, valeur) dans le cache d'une fonction @_cached, sans l'appeler."""
+    hit, value = _cache.get((fn.__name__, args))
+    if hit:
+        count("cache_hits")
+    return hit, value
+
+
+def _cache_store(fn, value, *args):
+    _cache.set((fn.__name__, args), value, fn.cache_ttl)
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def cache_stats():
+    """{fonction: {"hits": n, "misses": n}}"""
+    names = set(_cache.hits) | set(_cache.misses)
+    return {
+        name: {"hits": _cache.hits[name], "misses": _cache.misses[name]}
+        for name in sorted(names)
+    }
 
 
 # ================= AUTH =================
 def login_user(email, password):
     try:
-        user = auth.get_user_by_email(email)
-        st.session_state.auth_user = {
-            "uid": user.uid,
-            "email": email
-        }
-        return True
+        with timed("storage", "get_auth_uid"):
+            uid = get_backend().get_auth_uid(email)
     except Exception:
         return False
+    if uid is None:
+        return False
+
+    st.session_state.auth_user = {
+        "uid": uid,
+        "email": email
+    }
+    return True
 
 
 def logout_user():
@@ -48,41 +188,172 @@ def is_admin():
     if not auth_user:
         return False
 
-    email = auth_user.get("email")
-    doc = USERS.document(email).get()
-    return doc.exists and bool(doc.to_dict().get("admin", False))
+    return _is_admin_email(auth_user.get("email"))
+
+
+@_cached(ttl=300)
+@instrumented("storage", "get_user", reads=1)
+def _is_admin_email(email):
+    user = get_backend().get_user(email)
+    return user is not None and bool(user.get("admin", False))
 
 
 # ================= AVAILABILITÉS =================
 def load_availability(email, year, month):
-    doc = USERS.document(email).get()
-    if not doc.exists:
-        return {}
-    return doc.to_dict().get(f"availability_{year}_{month}", {})
+    replica = get_replica()
+    if replica is not None:
+        with timed("replica", "load_availability"):
+            # copie : le calendrier modifie ce dictionnaire en place
+            return dict(replica.availability(year, month, [email])[email])
+    return _load_availability(email, year, month)
 
 
-def save_availability(email, year, month, availability):
-    USERS.document(email).set(
-        {f"availability_{year}_{month}": availability},
-        merge=True
-    )
+@instrumented("storage", "load_availability", reads=1)
+def _load_availability(email, year, month):
+    return get_backend().load_availability(email, year, month)
+
+
+def save_availability(email, year, month, availability, changed=None):
+    """
+    changed=None : réécrit toute la carte du mois.
+    changed=[jours] : n'écrit que ces jours (supprimés s'ils ne sont plus
+    dans `availability`), en une seule écriture transactionnelle qui lève
+    PlanningLockedError si le mois a été verrouillé entre-temps.
+    """
+    with timed("storage", "save_availability"):
+        get_backend().save_availability(email, year, month, availability, changed=changed)
+    count("reads", 0 if changed is None else 1)  # lecture du verrou (transaction)
+    count("writes")
+    invalidate_cache("_list_users")
+
+    replica = get_replica()
+    if replica is not None:
+        replica.apply(email, year, month, availability, changed=changed)
+
+
+def load_all_availability(year, month, users=None):
+    """
+    Disponibilités de tous les utilisateurs pour (year, month), en une
+    seule requête groupée (un document par personne ayant saisi le mois) ;
+    pas de relecture des profils si `users` (résultat de get_all_users)
+    est fourni.
+    """
+    replica = get_replica()
+    if replica is not None:
+        with timed("replica", "load_all_availability"):
+            return replica.availability(year, month, users)
+
+    with timed("storage", "load_all_availability"):
+        result = get_backend().load_all_availability(year, month, users=users)
+    count("reads", (len(result) if users is None else 0) + _availability_reads(result))
+    return result
+
+
+def _availability_reads(month_availability):
+    # Un document mensuel lu par personne ayant des disponibilités ce mois-ci
+    return sum(1 for avail in month_availability.values() if avail)
 
 
 # ================= USERS =================
 def get_all_users():
-    return {d.id: d.to_dict() for d in USERS.stream()}
+    replica = get_replica()
+    if replica is not None:
+        with timed("replica", "get_all_users"):
+            return replica.users()
+    return _list_users()
+
+
+@_cached(ttl=60)
+@instrumented("storage", "get_all_users", reads=len)
+def _list_users():
+    return get_backend().list_users()
 
 
 # ================= PLANNING LOCK =================
+@_cached(ttl=30)
+@instrumented("storage", reads=1)
 def is_planning_locked(year, month):
-    return LOCKS.document(f"{year}_{month}").get().exists
+    return get_backend().is_locked(year, month)
 
 
+@instrumented("storage", writes=2)
 def lock_planning(year, month, planning_data):
-    LOCKS.document(f"{year}_{month}").set({"locked": True})
-    PLANNINGS.document(f"{year}_{month}").set(planning_data)
+    get_backend().lock_planning(year, month, planning_data)
+    invalidate_cache("is_planning_locked", year, month)
+    invalidate_cache("load_locked_planning", year, month)
 
 
+@instrumented("storage", reads=1, writes=1)
+def amend_locked_planning(year, month, planning_data, amendment):
+    """
+    Remplace le planning validé d'un mois verrouillé (le verrou reste en
+    place) ; `amendment` est ajouté à l'historique "amendments". Les
+    autres champs (empreinte des entrées…) sont conservés.
+    """
+    previous = get_backend().load_planning(year, month) or {}
+    amendments = previous.get("amendments", []) + [{
+        "at": datetime.datetime.now().isoformat(timespec="seconds"),
+        **amendment,
+    }]
+    get_backend().save_planning(
+        year, month, {**previous, **planning_data, "amendments": amendments}
+    )
+    invalidate_cache("load_locked_planning", year, month)
+
+
+@_cached(ttl=300)
+@instrumented("storage", reads=1)
 def load_locked_planning(year, month):
-    doc = PLANNINGS.document(f"{year}_{month}").get()
-    return doc.to_dict() if doc.exists else None
\ No newline at end of file
+    return get_backend().load_planning(year, month)
+
+
+# ================= PAGE ADMIN (lectures concurrentes) =================
+def load_admin_bundle(months):
+    """
+    Utilisateurs, verrous, plannings validés et disponibilités de `months`
+    ([(année, mois)]), lus en parallèle par le backend asynchrone.
+    Ce qui est déjà en cache ou dans la réplica n'est pas relu, et les
+    résultats alimentent le cache : get_all_users(), is_planning_locked()
+    et load_locked_planning() sur ces mois ne refont pas de lecture.
+    """
+    months = list(months)
+    availability = {}
+
+    replica = get_replica()
+    if replica is not None:
+        users = replica.users()
+        availability = {ym: replica.availability(*ym, users) for ym in months}
+    else:
+        hit, users = _cache_lookup(_list_users)
+        if not hit:
+            users = None
+
+    locked, plannings = {}, {}
+    for ym in months:
+        hit, value = _cache_lookup(is_planning_locked, *ym)
+        if hit:
+            locked[ym] = value
+        hit, value = _cache_lookup(load_locked_planning, *ym)
+        if hit:
+            plannings[ym] = value
+
+    with timed("storage", "load_admin_bundle"):
+        bundle = run(_load_admin_bundle(
+            get_async_backend(), months,
+            users=users, locked=locked, plannings=plannings,
+            availability=availability,
+        ))
+
+    count("reads", (len(bundle.users) if users is None else 0)
+          + (len(months) - len(locked)) + (len(months) - len(plannings))
+          + sum(_availability_reads(bundle.availability[ym]) for ym in months if ym not in availability))
+
+    if users is None:
+        _cache_store(_list_users, bundle.users)
+    for ym in months:
+        if ym not in locked:
+            _cache_store(is_planning_locked, bundle.locked[ym], *ym)
+        if ym not in plannings:
+            _cache_store(load_locked_planning, bundle.plannings[ym], *ym)
+
+    return bundle
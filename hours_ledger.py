@@ -0,0 +1,255 @@
+"""
+Registre des heures cumulées.
+
+- cumul_heures.json   : solde d'ouverture (historique, {nom: heures})
+- hours_ledger.jsonl  : journal append-only, une ligne par verrouillage
+                        de planning : {"seq", "period", "deltas"}
+- hours_snapshot.json : instantané compacté (totaux + heures par période)
+
+Au chargement : instantané + relecture du journal. En mémoire : totaux
+par utilisateur, par période ("AAAA-MM") et par année. Les lectures se
+font en mémoire ; refresh() relit, sous verrou, la fin du journal
+(verrouillages écrits par d'autres processus) : une fois par rerun.
+Écritures sous verrou de fichier (flock) : une ligne du journal est
+écrite d'un bloc, l'instantané est remplacé atomiquement (os.replace).
+"""
+
+import fcntl
+import json
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+OPENING_FILE = "cumul_heures.json"
+LOG_FILE = "hours_ledger.jsonl"
+SNAPSHOT_FILE = "hours_snapshot.json"
+LOCK_FILE = ".hours_ledger.lock"
+
+
+def period_key(year, month):
+    return f"{year:04d}-{month:02d}"
+
+
+class HoursLedger:
+
+    def __init__(self, directory=".", aliases=None, compact_every=50, opening_file=None):
+        """
+        aliases      : {clé du solde d'ouverture: clé utilisateur}, par
+                       exemple {nom: email}, cumul_heures.json étant
+                       indexé par nom.
+        opening_file : solde d'ouverture (défaut : directory/cumul_heures.json)
+        """
+        self.directory = Path(directory)
+        self.opening_file = Path(opening_file) if opening_file else self.directory / OPENING_FILE
+        self.aliases = aliases or {}
+        self.compact_every = compact_every
+        self._mutex = threading.Lock()  # sessions Streamlit : un thread chacune
+        self._reset()
+        with self._locked():
+            self._load()
+
+    # ================= LECTURE =================
+    def refresh(self):
+        """Relit la fin du journal (verrouillages d'autres processus)."""
+        with self._locked():
+            self._refresh()
+
+    def total(self, user):
+        """Heures cumulées (solde d'ouverture compris)."""
+        with self._mutex:
+            return self._totals.get(user, 0)
+
+    def period_hours(self, user, year, month):
+        with self._mutex:
+            return self._periods.get(period_key(year, month), {}).get(user, 0)
+
+    def year_to_date(self, user, year):
+        with self._mutex:
+            return self._years.get(year, {}).get(user, 0)
+
+    def totals(self):
+        with self._mutex:
+            return dict(self._totals)
+
+    def year_totals(self, year):
+        """{utilisateur: heures} de l'année."""
+        with self._mutex:
+            return dict(self._years.get(year, {}))
+
+    def carry_over(self, contract_hours, year, month):
+        """
+        Écart à rattraper avant (year, month) : heures contrat moins heures
+        réalisées, sur les mois écoulés de l'année ayant un planning
+        enregistré (> 0 = en retard). Un mois jamais verrouillé ne compte pas.
+        """
+        with self._mutex:
+            recorded = [
+                dict(self._periods[period_key(year, m)])
+                for m in range(1, month)
+                if period_key(year, m) in self._periods
+            ]
+        carry = {}
+        for user, contract in contract_hours.items():
+            if not contract:
+                continue
+            done = sum(hours.get(user, 0) for hours in recorded)
+            carry[user] = contract * len(recorded) - done
+        return carry
+
+    def set_aliases(self, aliases):
+        """Remplace les alias (utilisateur ajouté ou renommé) et recharge."""
+        aliases = dict(aliases)
+        if aliases == self.aliases:
+            return
+        with self._locked():
+            self.aliases = aliases
+            self._reset()
+            self._load()
+
+    # ================= ÉCRITURE =================
+    def record_period(self, year, month, hours_by_user):
+        """
+        Enregistre les heures d'un mois verrouillé. Un nouveau
+        verrouillage du même mois remplace le précédent : seul l'écart
+        est journalisé.
+        """
+        period = period_key(year, month)
+
+        with self._locked():
+            self._refresh()
+            current = self._periods.get(period, {})
+            deltas = {
+                user: hours_by_user.get(user, 0) - current.get(user, 0)
+                for user in set(current) | set(hours_by_user)
+            }
+            deltas = {u: d for u, d in deltas.items() if d}
+            if not deltas:
+                return
+
+            entry = {"seq": self._seq + 1, "period": period, "deltas": deltas}
+            line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            with open(self._path(LOG_FILE), "ab") as f:
+                f.seek(0, os.SEEK_END)
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                self._log_offset = f.tell()
+                self._log_entries += 1
+            self._apply(entry)
+
+            if self._log_entries >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        """Intègre le journal dans l'instantané puis le vide."""
+        with self._locked():
+            self._refresh()
+            self._compact()
+
+    # ================= INTERNE =================
+    def _path(self, name):
+        return self.directory / name
+
+    @contextmanager
+    def _locked(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._path(LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with self._mutex:
+                    yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _reset(self):
+        self._seq = 0
+        self._snapshot_id = None
+        self._log_offset = 0
+        self._log_entries = 0
+        self._opening = {}
+        self._totals = defaultdict(int)
+        self._periods = defaultdict(lambda: defaultdict(int))
+        self._years = defaultdict(lambda: defaultdict(int))
+
+    def _current_snapshot_id(self):
+        try:
+            st = self._path(SNAPSHOT_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns
+
+    def _load(self):
+        snapshot = self._path(SNAPSHOT_FILE)
+        opening = self.opening_file
+        self._snapshot_id = self._current_snapshot_id()
+
+        if self._snapshot_id is not None:
+            data = json.loads(snapshot.read_text(encoding="utf-8"))
+            self._seq = data["seq"]
+            self._opening = data["opening"]
+            periods = data["periods"]
+        else:
+            if opening.exists():
+                self._opening = json.loads(opening.read_text(encoding="utf-8"))
+            periods = {}
+
+        for user, hours in self._opening.items():
+            self._totals[self.aliases.get(user, user)] += hours
+        for period, hours in periods.items():
+            self._apply({"period": period, "deltas": hours})
+
+        self._read_log(min_seq=self._seq)
+
+    def _refresh(self):
+        """Relit la fin du journal (écritures d'autres processus)."""
+        if self._current_snapshot_id() != self._snapshot_id:
+            # Compacté par un autre processus : tout recharger
+            self._reset()
+            self._load()
+        else:
+            self._read_log(min_seq=self._seq)
+
+    def _read_log(self, min_seq):
+        # Les entrées déjà intégrées à l'instantané (seq <= min_seq) sont
+        # ignorées : une compaction interrompue ne compte rien deux fois.
+        log = self._path(LOG_FILE)
+        if not log.exists():
+            return
+
+        with open(log, "rb") as f:
+            f.seek(self._log_offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # ligne incomplète (écriture interrompue)
+                self._log_offset += len(raw)
+                self._log_entries += 1
+                entry = json.loads(raw)
+                if entry["seq"] > min_seq:
+                    self._apply(entry)
+
+    def _apply(self, entry):
+        period = entry["period"]
+        year = int(period[:4])
+        for user, delta in entry["deltas"].items():
+            self._totals[user] += delta
+            self._periods[period][user] += delta
+            self._years[year][user] += delta
+        self._seq = max(self._seq, entry.get("seq", 0))
+
+    def _compact(self):
+        data = {
+            "seq": self._seq,
+            "opening": self._opening,
+            "periods": {p: dict(h) for p, h in self._periods.items()},
+        }
+        tmp = self._path(SNAPSHOT_FILE + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self._path(SNAPSHOT_FILE))
+        self._snapshot_id = self._current_snapshot_id()
+
+        tmp = self._path(LOG_FILE + ".tmp")
+        tmp.write_bytes(b"")
+        os.replace(tmp, self._path(LOG_FILE))
+        self._log_offset = self._log_entries = 0
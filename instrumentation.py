@@ -0,0 +1,132 @@
+"""
+Instrumentation légère des chemins chauds (stockage, solveur, rendu).
+
+Une « exécution » (un rerun Streamlit) = un RerunStats courant par
+thread : durées par (catégorie, nom) et compteurs (lectures, écritures,
+hits de cache...). Sans exécution courante, tout est sans effet.
+
+    stats = begin_rerun("admin")
+    with timed("solver", "blocks"):
+        ...
+    end_rerun()   # fin du script (ou juste avant st.stop / st.rerun)
+    @instrumented("storage", reads=1)
+    def load(...): ...
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class RerunStats:
+
+    def __init__(self, label=""):
+        self.label = label
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._last = self._t0
+        self._end = None                # fin du rerun (end_rerun)
+        self.spans = []                 # (catégorie, nom, début ms, durée ms)
+        self.counters = defaultdict(int)
+
+    def add_span(self, category, name, start, end):
+        self.spans.append((
+            category,
+            name,
+            round((start - self._t0) * 1000, 3),
+            round((end - start) * 1000, 3),
+        ))
+        self._last = max(self._last, end)
+
+    def finish(self):
+        self._end = time.perf_counter()
+
+    def summary(self):
+        """{(catégorie, nom): [appels, durée totale ms]}"""
+        totals = {}
+        for category, name, _, duration in self.spans:
+            entry = totals.setdefault((category, name), [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+        return totals
+
+    def to_dict(self):
+        # Sans fin enregistrée (sortie non prévue), on s'arrête à la dernière mesure
+        end = self._end if self._end is not None else self._last
+        return {
+            "label": self.label,
+            "started": self.started,
+            "total_ms": round((max(end, self._last) - self._t0) * 1000, 3),
+            "spans": [
+                {"category": c, "name": n, "at_ms": at, "ms": ms}
+                for c, n, at, ms in self.spans
+            ],
+            "counters": dict(self.counters),
+        }
+
+
+def begin_rerun(label=""):
+    """Démarre une nouvelle exécution pour le thread courant."""
+    _local.stats = RerunStats(label)
+    return _local.stats
+
+
+def end_rerun():
+    """Termine l'exécution courante : sa durée inclut le rendu non mesuré."""
+    stats = current()
+    if stats is not None:
+        stats.finish()
+
+
+def current():
+    return getattr(_local, "stats", None)
+
+
+def count(counter, n=1):
+    stats = current()
+    if stats is not None and n:
+        stats.counters[counter] += n
+
+
+@contextmanager
+def timed(category, name):
+    stats = current()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_span(category, name, start, time.perf_counter())
+
+
+def instrumented(category, name=None, reads=0, writes=0):
+    """
+    Décorateur : mesure chaque appel et incrémente les compteurs
+    `reads` / `writes` (entier, ou fonction du résultat).
+    """
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(category, label):
+                result = fn(*args, **kwargs)
+            count("reads", reads(result) if callable(reads) else reads)
+            count("writes", writes(result) if callable(writes) else writes)
+            return result
+        return wrapper
+    return decorator
+
+
+def export_jsonl(records, path):
+    """Ajoute des exécutions (dicts de to_dict) à un fichier JSON lines."""
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
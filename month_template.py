@@ -0,0 +1,112 @@
+import datetime as dt
+import calendar
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+
+# ============================================================
+# GABARIT MENSUEL (calendrier + blocs), partagé solveurs / UI
+# ============================================================
+# Un seul endroit calcule les semaines d’affichage, les jours du mois,
+# leurs clés ISO et les bornes des blocs. planner_engine, main.py et les
+# composants calendrier lisent le même gabarit : ils ne peuvent plus
+# diverger sur le découpage des blocs.
+#
+# Règles de blocs : tuple de (type, premier jour, dernier jour) en
+# jours de la semaine (0 = lundi). Chaque bloc est découpé par semaine
+# d’affichage puis rogné aux bornes du mois.
+
+BLOCK_RULES = (
+    ("week", 0, 3),     # Lundi → Jeudi
+    ("weekend", 4, 6),  # Vendredi → Dimanche
+)
+
+HOURS_PER_DAY = 10
+
+
+@dataclass(frozen=True, slots=True)
+class BlockSpec:
+    week: int           # numéro de semaine d’affichage (1 = première)
+    type: str
+    start: dt.date
+    end: dt.date
+    first: int          # décalage du premier jour (0 = le 1er du mois)
+    last: int           # décalage du dernier jour (inclus)
+    mask: int           # bits first → last
+
+    @property
+    def days(self) -> int:
+        return self.last - self.first + 1
+
+    @property
+    def hours(self) -> int:
+        return self.days * HOURS_PER_DAY
+
+
+@dataclass(frozen=True, eq=False)
+class MonthTemplate:
+    year: int
+    month: int
+    weeks: tuple        # semaines Lun → Dim (jours hors mois inclus)
+    days: tuple         # dates du mois
+    keys: tuple         # "AAAA-MM-JJ" par jour du mois
+    offsets: MappingProxyType  # "AAAA-MM-JJ" → décalage
+    blocks: tuple       # BlockSpec dans l’ordre du planning
+    block_of_day: tuple  # décalage → indice du bloc (None si hors bloc)
+
+    @property
+    def first_day(self) -> dt.date:
+        return self.days[0]
+
+    @property
+    def last_day(self) -> dt.date:
+        return self.days[-1]
+
+
+@lru_cache(maxsize=64)
+def month_template(year: int, month: int, rules: tuple = BLOCK_RULES) -> MonthTemplate:
+    """
+    Gabarit du mois, calculé une fois par (année, mois, règles) puis servi
+    depuis un LRU borné. L’objet est partagé : ne pas le modifier.
+    """
+    weeks = tuple(
+        tuple(week)
+        for week in calendar.Calendar(firstweekday=0).monthdatescalendar(year, month)
+    )
+    days = tuple(d for week in weeks for d in week if d.month == month)
+    keys = tuple(d.isoformat() for d in days)
+
+    blocks = []
+    block_of_day = [None] * len(days)
+
+    for w_idx, week in enumerate(weeks, start=1):
+        for block_type, first_wd, last_wd in rules:
+            span = [
+                d for d in week
+                if d.month == month and first_wd <= d.weekday() <= last_wd
+            ]
+            if not span:
+                continue
+            first, last = span[0].day - 1, span[-1].day - 1
+            for offset in range(first, last + 1):
+                block_of_day[offset] = len(blocks)
+            blocks.append(BlockSpec(
+                week=w_idx,
+                type=block_type,
+                start=span[0],
+                end=span[-1],
+                first=first,
+                last=last,
+                mask=((1 << (last - first + 1)) - 1) << first,
+            ))
+
+    return MonthTemplate(
+        year=year,
+        month=month,
+        weeks=weeks,
+        days=days,
+        keys=keys,
+        offsets=MappingProxyType({key: i for i, key in enumerate(keys)}),
+        blocks=tuple(blocks),
+        block_of_day=tuple(block_of_day),
+    )
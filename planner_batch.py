@@ -0,0 +1,199 @@
+"""
+Planification en lot, multi-sites.
+
+Les sites / équipes ne partagent pas de personnel : les utilisateurs sont
+partitionnés par un attribut du document utilisateur (`site` par défaut),
+et chaque couple (site, mois) est résolu indépendamment par
+generate_planning, dans un pool de processus.
+
+    from planner_batch import plan_batch
+    batch = plan_batch([(2026, 3), (2026, 4)], users, availability_by_month,
+                       solver="optimal", max_workers=4)
+
+Le résultat est fusionné dans un ordre déterministe (mois, puis site),
+quel que soit l'ordre de fin des processus.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from planner_engine import generate_planning
+
+SITE_FIELD = "site"
+DEFAULT_SITE = "—"  # utilisateurs sans attribut de site
+
+
+@dataclass
+class ShardResult:
+    site: str
+    year: int
+    month: int
+    blocks: list
+    warnings: list
+    users: int
+    seconds: float
+
+
+@dataclass
+class BatchResult:
+    shards: list = field(default_factory=list)
+    seconds: float = 0.0
+    workers: int = 1
+
+    @property
+    def warnings(self) -> list:
+        """Alertes de tous les shards, préfixées par site et mois."""
+        return [
+            f"[{s.site} — {s.month:02d}/{s.year}] {w}"
+            for s in self.shards
+            for w in s.warnings
+        ]
+
+    def timings(self) -> list:
+        """[(site, année, mois, secondes)] dans l'ordre des shards."""
+        return [(s.site, s.year, s.month, s.seconds) for s in self.shards]
+
+
+def partition_users(users: dict, key: str = SITE_FIELD) -> dict:
+    """{site: {email: doc}}, sites triés, ordre des utilisateurs conservé."""
+    shards = {}
+    for email, info in users.items():
+        shards.setdefault(str(info.get(key) or DEFAULT_SITE), {})[email] = info
+    return dict(sorted(shards.items()))
+
+
+def plan_batch(
+    months,
+    users: dict,
+    availability_by_month: dict,
+    *,
+    key: str = SITE_FIELD,
+    solver: str = "greedy",
+    time_budget: float = 0.5,
+    weights: dict | None = None,
+    carry_over: dict | None = None,
+    max_workers: int | None = None,
+) -> BatchResult:
+    """
+    Résout chaque (site, mois) de `months` × partition_users(users, key).
+
+    availability_by_month : {(année, mois): {email: {"AAAA-MM-JJ": bool}}}
+    carry_over            : {email: heures} appliqué à chaque mois
+    max_workers           : plafond du pool (défaut : nb de CPU) ;
+                            1 = résolution dans le processus courant
+    """
+    started = time.perf_counter()
+    carry_over = carry_over or {}
+
+    tasks = []
+    for year, month in months:
+        month_availability = availability_by_month.get((year, month), {})
+        for site, site_users in partition_users(users, key).items():
+            tasks.append((
+                site, year, month, site_users,
+                {u: month_availability.get(u, {}) for u in site_users},
+                {u: info.get("contract_hours", 0) for u, info in site_users.items()},
+                solver, time_budget, weights,
+                {u: carry_over[u] for u in site_users if u in carry_over},
+            ))
+
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(tasks)))
+
+    if workers == 1:
+        shards = [_solve_shard(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            shards = list(pool.map(_solve_shard, tasks, chunksize=chunksize))
+
+    # Ordre déterministe : mois, puis site
+    shards.sort(key=lambda s: (s.year, s.month, s.site))
+
+    return BatchResult(
+        shards=shards,
+        seconds=time.perf_counter() - started,
+        workers=workers,
+    )
+
+
+def _solve_shard(task) -> ShardResult:
+    (site, year, month, site_users, availability, contract_hours,
+     solver, time_budget, weights, carry_over) = task
+
+    started = time.perf_counter()
+    result = generate_planning(
+        year=year,
+        month=month,
+        users=site_users,
+        availability_by_user=availability,
+        contract_hours=contract_hours,
+        solver=solver,
+        time_budget=time_budget,
+        weights=weights,
+        carry_over=carry_over,
+    )
+
+    return ShardResult(
+        site=site,
+        year=year,
+        month=month,
+        blocks=result["blocks"],
+        warnings=result["warnings"],
+        users=len(site_users),
+        seconds=time.perf_counter() - started,
+    )
+
+
+# --------------------------------------------------------------
+# Ligne de commande (pré-planification nocturne)
+# --------------------------------------------------------------
+def main(argv=None):
+    import argparse
+
+    from storage import create_backend
+
+    parser = argparse.ArgumentParser(description="Planification multi-sites en lot")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--month", type=int, required=True)
+    parser.add_argument("--months", type=int, default=1, help="nombre de mois à partir de --month")
+    parser.add_argument("--key", default=SITE_FIELD, help="attribut de partition (défaut : site)")
+    parser.add_argument("--solver", choices=["greedy", "optimal"], default="greedy")
+    parser.add_argument("--workers", type=int, help="plafond de processus")
+    parser.add_argument("--storage", help="URL de stockage (défaut : $PLANNING_STORAGE)")
+    args = parser.parse_args(argv)
+
+    months = []
+    year, month = args.year, args.month
+    for _ in range(args.months):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    backend = create_backend(args.storage)
+    users = backend.list_users()
+    availability_by_month = {
+        (y, m): backend.load_all_availability(y, m, users=users) for y, m in months
+    }
+
+    batch = plan_batch(
+        months, users, availability_by_month,
+        key=args.key, solver=args.solver, max_workers=args.workers,
+    )
+
+    for shard in batch.shards:
+        covered = sum(b.assigned_to is not None for b in shard.blocks)
+        print(
+            f"{shard.site:<12} {shard.month:02d}/{shard.year}  "
+            f"{shard.users:>5} pers.  {covered}/{len(shard.blocks)} blocs  "
+            f"{shard.seconds * 1000:8.1f} ms"
+        )
+    print(f"\n{len(batch.shards)} shards, {batch.workers} processus, {batch.seconds:.2f} s")
+    for w in batch.warnings:
+        print("⚠️", w)
+
+    return batch
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
-import datetime as dt
-import calendar
+import time
+from collections import defaultdict
+
+from instrumentation import timed
+from month_template import month_template
+from planning_blocks import Block
 
 # ============================================================
 # SOLVEUR RH – VERSION 1 (STABLE)
@@ -11,9 +15,39 @@ import calendar
 # - Pas deux blocs consécutifs pour une même personne
 # - Attribution uniquement si dispo sur TOUS les jours du bloc
 # - Pas d’optimisation avancée (V1 volontairement simple)
+#   → solver="optimal" : couverture maximale + équilibrage (V2)
 # ============================================================
 
 
+# =======================
+# Index de disponibilités (bitmask)
+# =======================
+# Chaque mois d’un utilisateur devient un entier : bit (jour - 1) = 1
+# si l’utilisateur est dispo (True) ce jour-là. Un bloc devient lui aussi
+# un masque de jours : « dispo sur tout le bloc » = un seul AND.
+
+def build_availability_index(year: int, month: int, availability_by_user: dict) -> dict:
+    """
+    Construit une seule fois par résolution l’index {email: bitmask}
+    à partir des dictionnaires {"AAAA-MM-JJ": True/False}.
+    L’ordre des utilisateurs est conservé.
+    """
+    offsets = month_template(year, month).offsets
+    index = {}
+
+    for email, avail in availability_by_user.items():
+        mask = 0
+        for day, value in avail.items():
+            if value is not True:
+                continue
+            offset = offsets.get(day)
+            if offset is not None:
+                mask |= 1 << offset
+        index[email] = mask
+
+    return index
+
+
 def generate_planning(
     *,
     year: int,
@@ -21,93 +55,446 @@ def generate_planning(
     users: dict,
     availability_by_user: dict,
     contract_hours: dict,
+    solver: str = "greedy",
+    time_budget: float = 0.5,
+    weights: dict | None = None,
+    carry_over: dict | None = None,
 ):
     """
     Génère un planning mensuel basé sur :
     - disponibilités (True = dispo)
     - règles RH blocs semaine / week-end
-    """
 
-    blocks = []
-    warnings = []
+    solver :
+    - "greedy"  : V1, premier utilisateur disponible (ordre du dict)
+    - "optimal" : couverture maximale, puis écart aux heures contrat
+                  et équilibre des week-ends (dans `time_budget` secondes)
 
-    cal = calendar.Calendar(firstweekday=0)
-    weeks = cal.monthdatescalendar(year, month)
+    carry_over : heures à rattraper des mois précédents par utilisateur
+    (HoursLedger.carry_over), ajoutées à l'objectif du mois en mode optimal.
+    """
 
-    block_id = 0
+    warnings = []
 
     # =======================
     # 1️⃣ Construction des blocs
     # =======================
-    for w_idx, week in enumerate(weeks, start=1):
-
-        # ---- Bloc semaine : Lundi → Jeudi ----
-        week_days = [d for d in week if d.month == month and d.weekday() <= 3]
-        if week_days:
-            blocks.append({
-                "id": block_id,
-                "week": w_idx,
-                "type": "week",
-                "start": week_days[0],
-                "end": week_days[-1],
-                "hours": len(week_days) * 10,
-                "assigned_to": None,
-                "status": "unassigned",
-            })
-            block_id += 1
-
-        # ---- Bloc week-end : Vendredi → Dimanche ----
-        weekend_days = [d for d in week if d.month == month and d.weekday() >= 4]
-        if weekend_days:
-            blocks.append({
-                "id": block_id,
-                "week": w_idx,
-                "type": "weekend",
-                "start": weekend_days[0],
-                "end": weekend_days[-1],
-                "hours": len(weekend_days) * 10,
-                "assigned_to": None,
-                "status": "unassigned",
-            })
-            block_id += 1
+    with timed("solver", "blocks"):
+        template = month_template(year, month)
+        blocks = build_blocks(year, month)
 
     # =======================
-    # 2️⃣ Affectation simple (V1)
+    # 2️⃣ Affectation
     # =======================
+    with timed("solver", "index"):
+        index = build_availability_index(year, month, availability_by_user)
+        masks = [spec.mask for spec in template.blocks]
+
+    with timed("solver", f"assign_{solver}"):
+        if solver == "greedy":
+            assignment = _assign_greedy(masks, index)
+        elif solver == "optimal":
+            assignment = _assign_optimal(
+                blocks, masks, index, monthly_targets(contract_hours, carry_over),
+                time_budget=time_budget,
+                weights={**DEFAULT_WEIGHTS, **(weights or {})},
+            )
+        else:
+            raise ValueError(f"Solveur inconnu : {solver!r}")
+
+    for block, email in zip(blocks, assignment):
+        block.assign(email)
+        if email is None:
+            warnings.append(
+                f"Bloc {block.type} — semaine {block.week} non couvert"
+            )
+
+    # =======================
+    # 3️⃣ Résultat
+    # =======================
+    return {
+        "blocks": blocks,
+        "warnings": warnings,
+    }
+
+
+def build_blocks(year: int, month: int) -> list:
+    """Blocs semaine (Lun → Jeu) et week-end (Ven → Dim) du mois."""
+    return [
+        Block(
+            id=block_id,
+            week=spec.week,
+            type=spec.type,
+            start=spec.start,
+            end=spec.end,
+            hours=spec.hours,
+        )
+        for block_id, spec in enumerate(month_template(year, month).blocks)
+    ]
+
+
+def monthly_targets(contract_hours: dict, carry_over: dict | None) -> dict:
+    """Objectif d'heures du mois (None = pas de contrat, donc pas d'objectif)."""
+    carry_over = carry_over or {}
+    return {
+        email: max(0, hours + carry_over.get(email, 0)) if hours else None
+        for email, hours in (contract_hours or {}).items()
+    }
+
+
+# =======================
+# Solveur V1 (glouton)
+# =======================
+def _assign_greedy(masks: list, index: dict) -> list:
+    assignment = []
     last_assigned = None  # pour éviter deux blocs consécutifs
 
-    for block in blocks:
-        assigned = False
+    for mask in masks:
+        chosen = None
 
-        for email, avail in availability_by_user.items():
+        for email, avail_mask in index.items():
 
             # ❌ règle : pas deux blocs d’affilée
             if email == last_assigned:
                 continue
 
-            # Jours couverts par le bloc
-            days = [
-                (block["start"] + dt.timedelta(days=i)).isoformat()
-                for i in range((block["end"] - block["start"]).days + 1)
-            ]
-
-            # Vérification stricte : dispo sur TOUS les jours
-            if all(avail.get(day) is True for day in days):
-                block["assigned_to"] = email
-                block["status"] = "assigned"
+            # Vérification stricte : dispo sur TOUS les jours (un seul AND)
+            if avail_mask & mask == mask:
+                chosen = email
                 last_assigned = email
-                assigned = True
                 break
 
-        if not assigned:
-            warnings.append(
-                f"Bloc {block['type']} — semaine {block['week']} non couvert"
+        assignment.append(chosen)
+
+    return assignment
+
+
+# =======================
+# Solveur V2 (optimal)
+# =======================
+# 1. Couverture maximale exacte par programmation dynamique sur la suite
+#    des blocs : la seule contrainte entre blocs est « pas la même personne
+#    sur deux blocs consécutifs », donc l’état = la personne du bloc courant.
+#    Coût O(blocs × candidats), sans énumération.
+# 2. Recherche locale (réaffectation d’un bloc à un autre candidat) qui
+#    garde la couverture et réduit :
+#    - l’écart aux heures contrat (|heures - objectif|, contrat 0 = sans objectif)
+#    - le déséquilibre des week-ends (somme des carrés par personne)
+#    jusqu’à convergence ou épuisement du budget temps.
+
+DEFAULT_WEIGHTS = {
+    "hours": 1.0,
+    "weekend": 20.0,
+}
+
+
+def eligible_candidates(masks: list, index: dict) -> list:
+    """Pour chaque bloc, la liste des utilisateurs dispo sur tout le bloc."""
+    return [
+        [email for email, avail_mask in index.items() if avail_mask & mask == mask]
+        for mask in masks
+    ]
+
+
+def max_coverage(eligible: list) -> list:
+    """
+    Affectation couvrant le plus de blocs possible sans qu’une personne
+    n’enchaîne deux blocs consécutifs. Retourne un affecté par bloc
+    (None = bloc non couvert).
+    """
+    layers = []  # par bloc : ({email: couverture}, couverture si non couvert)
+    prev, prev_none = {}, 0
+
+    for candidates in eligible:
+        # Deux meilleurs états du bloc précédent (personnes distinctes)
+        best_u, best, second = None, prev_none, prev_none
+        for u, score in prev.items():
+            if score > best:
+                best_u, best, second = u, score, best
+            elif score > second:
+                second = score
+
+        cur = {u: (second if u == best_u else best) + 1 for u in candidates}
+        cur_none = best
+        layers.append((cur, cur_none))
+        prev, prev_none = cur, cur_none
+
+    # Reconstruction à rebours
+    assignment = [None] * len(eligible)
+    state, target = None, prev_none
+    for u, score in prev.items():
+        if score > target:
+            state, target = u, score
+
+    for b in range(len(eligible) - 1, -1, -1):
+        assignment[b] = state
+        if b == 0:
+            break
+        target -= 1 if state is not None else 0
+        prev_scores, prev_none = layers[b - 1]
+        next_state = None
+        if prev_none != target:
+            next_state = next(
+                u for u, score in prev_scores.items()
+                if score == target and u != state
             )
+        state = next_state
+
+    return assignment
+
+
+def _assign_optimal(
+    blocks: list,
+    masks: list,
+    index: dict,
+    targets: dict,
+    *,
+    time_budget: float,
+    weights: dict,
+) -> list:
+    deadline = time.perf_counter() + time_budget
+    eligible = eligible_candidates(masks, index)
+    assignment = max_coverage(eligible)
+
+    w_hours = weights["hours"]
+    w_weekend = weights["weekend"]
+
+    hours = defaultdict(int)
+    weekends = defaultdict(int)
+    for block, email in zip(blocks, assignment):
+        if email is not None:
+            hours[email] += block.hours
+            weekends[email] += block.type == "weekend"
+
+    def deviation(email, h):
+        target = targets.get(email)
+        return abs(h - target) if target is not None else 0
+
+    improved = True
+    while improved:
+        improved = False
+
+        for b, current in enumerate(assignment):
+            if current is None:
+                continue
+            if time.perf_counter() > deadline:
+                return assignment
+
+            block_hours = blocks[b].hours
+            is_weekend = blocks[b].type == "weekend"
+            neighbours = {
+                assignment[b - 1] if b > 0 else None,
+                assignment[b + 1] if b + 1 < len(assignment) else None,
+            }
+
+            h_cur = hours[current]
+            removal = w_hours * (
+                deviation(current, h_cur - block_hours) - deviation(current, h_cur)
+            )
+            if is_weekend:
+                removal += w_weekend * (1 - 2 * weekends[current])
+
+            best_delta, best_email = 0.0, None
+            for email in eligible[b]:
+                if email == current or email in neighbours:
+                    continue
+                h = hours[email]
+                delta = removal + w_hours * (
+                    deviation(email, h + block_hours) - deviation(email, h)
+                )
+                if is_weekend:
+                    delta += w_weekend * (2 * weekends[email] + 1)
+                if delta < best_delta - 1e-9:
+                    best_delta, best_email = delta, email
+
+            if best_email is not None:
+                assignment[b] = best_email
+                hours[current] -= block_hours
+                hours[best_email] += block_hours
+                if is_weekend:
+                    weekends[current] -= 1
+                    weekends[best_email] += 1
+                improved = True
+
+    return assignment
+
+
+# =======================
+# Replanification incrémentale
+# =======================
+# Après une modification de disponibilités (absence en cours de mois…),
+# seuls les blocs touchés dont l’affecté n’est plus valide (ou qui
+# étaient non couverts) sont réexaminés, avec leurs voisins immédiats
+# (règle « pas deux blocs consécutifs ») ; la fenêtre ne s’élargit que si
+# la réparation locale perdrait un bloc couvert. Sur chaque fenêtre contiguë,
+# une programmation dynamique maximise, dans l’ordre :
+#   1. la couverture,
+#   2. la stabilité (affectations précédentes conservées),
+#   3. l’équilibre (candidat ayant le moins d’heures ce mois-ci).
+# Les blocs hors fenêtre ne bougent pas.
+
+def changed_cells(before: dict, after: dict) -> set:
+    """Cellules (email, "AAAA-MM-JJ") dont la valeur diffère entre deux états."""
+    cells = set()
+    for email in before.keys() | after.keys():
+        old, new = before.get(email, {}), after.get(email, {})
+        cells.update(
+            (email, day) for day in old.keys() | new.keys()
+            if old.get(day) != new.get(day)
+        )
+    return cells
+
+
+def replan_incremental(
+    *,
+    year: int,
+    month: int,
+    previous: list,
+    availability_by_user: dict,
+    changes,
+    max_radius: int = 3,
+):
+    """
+    Répare un planning existant après modification de disponibilités.
+
+    previous             : blocs d’un résultat précédent (non modifiés)
+    availability_by_user : disponibilités à jour
+    changes              : cellules modifiées [(email, "AAAA-MM-JJ")]
+
+    Retourne {"blocks", "warnings", "changes"} ; "changes" ne contient que
+    les blocs réaffectés : {"block", "week", "type", "from", "to"}.
+    """
+    template = month_template(year, month)
+    if len(previous) != len(template.blocks):
+        raise ValueError("Le planning précédent ne correspond pas à ce mois")
+
+    with timed("solver", "replan_index"):
+        index = build_availability_index(year, month, availability_by_user)
+        masks = [spec.mask for spec in template.blocks]
+        assignment = [b.assigned_to for b in previous]
+
+    # Blocs touchés dont l’affectation n’est plus valide (ou non couverts)
+    invalid = set()
+    for email, day in changes:
+        offset = template.offsets.get(day)
+        b = template.block_of_day[offset] if offset is not None else None
+        if b is None:
+            continue
+        current = assignment[b]
+        if current is None or index.get(current, 0) & masks[b] != masks[b]:
+            invalid.add(b)
+
+    with timed("solver", "replan_repair"):
+        # Fenêtre = blocs invalides ± voisins ; élargie d’un bloc de chaque
+        # côté (jusqu’à max_radius) tant qu’un bloc couvert auparavant
+        # resterait découvert.
+        for radius in range(1, max_radius + 1):
+            window = {
+                i for b in invalid for i in range(b - radius, b + radius + 1)
+                if 0 <= i < len(previous)
+            }
+            repaired = _repair(window, assignment, masks, index, previous)
+            if all(repaired[b] is not None for b in invalid if assignment[b] is not None):
+                break
+        assignment = repaired
+
+    blocks, warnings, diff = [], [], []
+    for block, email in zip(previous, assignment):
+        new_block = Block(
+            id=block.id, week=block.week, type=block.type,
+            start=block.start, end=block.end, hours=block.hours,
+        )
+        new_block.assign(email)
+        blocks.append(new_block)
+        if email is None:
+            warnings.append(f"Bloc {block.type} — semaine {block.week} non couvert")
+        if email != block.assigned_to:
+            diff.append({
+                "block": block.id, "week": block.week, "type": block.type,
+                "from": block.assigned_to, "to": email,
+            })
 
-    # =======================
-    # 3️⃣ Résultat
-    # =======================
     return {
         "blocks": blocks,
         "warnings": warnings,
-    }
\ No newline at end of file
+        "changes": diff,
+    }
+
+
+def _repair(window: set, assignment: list, masks: list, index: dict, previous: list) -> list:
+    repaired = list(assignment)
+
+    hours = defaultdict(int)
+    for b, email in enumerate(assignment):
+        if email is not None and b not in window:
+            hours[email] += previous[b].hours
+
+    for first, last in _runs(sorted(window)):
+        repaired[first:last + 1] = _repair_window(
+            first, last, repaired, masks, index, hours,
+        )
+    return repaired
+
+
+def _runs(indices: list):
+    """Suites contiguës (début, fin) d’indices triés."""
+    start = prev = None
+    for i in indices:
+        if start is None:
+            start = prev = i
+        elif i == prev + 1:
+            prev = i
+        else:
+            yield start, prev
+            start = prev = i
+    if start is not None:
+        yield start, prev
+
+
+_NO_SOURCE = object()
+
+
+def _repair_window(first, last, assignment, masks, index, hours) -> list:
+    # Voisins figés de part et d’autre de la fenêtre
+    left = assignment[first - 1] if first > 0 else None
+    right = assignment[last + 1] if last + 1 < len(assignment) else None
+
+    layers = []  # par bloc : {état: (score, état précédent)}, None = non couvert
+    prev = {None: ((0, 0, 0), None)}
+
+    for b in range(first, last + 1):
+        # Deux meilleurs états précédents (distincts)
+        ranked = sorted(prev.items(), key=lambda item: item[1][0], reverse=True)[:2]
+
+        candidates = [
+            email for email, avail_mask in index.items()
+            if avail_mask & masks[b] == masks[b]
+            and not (b == first and email == left)
+            and not (b == last and email == right)
+        ]
+
+        layer = {}
+        for state in [None] + candidates:
+            source = next(
+                (p for p, _ in ranked if state is None or p != state), _NO_SOURCE
+            )
+            if source is _NO_SOURCE:
+                continue
+            base = prev[source][0]
+            gain = (
+                0 if state is None else 1,
+                0 if state == assignment[b] else -1,
+                0 if state is None else -hours[state],
+            )
+            layer[state] = (tuple(x + y for x, y in zip(base, gain)), source)
+
+        layers.append(layer)
+        prev = layer
+
+    # Reconstruction à rebours
+    state = max(prev, key=lambda s: prev[s][0])
+    repaired = []
+    for layer in reversed(layers):
+        repaired.append(state)
+        state = layer[state][1]
+    return repaired[::-1]
@@ -0,0 +1,234 @@
+"""
+Scénarios « what-if » pour l'onglet admin.
+
+K plannings candidats du même mois, générés avec des ordres
+d'utilisateurs et des pondérations différents, puis notés :
+- couverture (part des blocs couverts),
+- écart aux heures contrat (somme des |heures - objectif|),
+- équilibre des week-ends (maximum de week-ends pour une personne).
+
+    from planner_scenarios import generate_scenarios
+    scenarios = generate_scenarios(year=2026, month=3, users=users,
+                                   availability_by_user=avail,
+                                   contract_hours=contracts, k=4)
+
+Le scénario 0 est toujours le planning V1 dans l'ordre d'origine (celui
+du bouton « Générer »), pour comparaison.
+"""
+
+import atexit
+import multiprocessing
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from planner_engine import DEFAULT_WEIGHTS, monthly_targets, generate_planning
+
+# (libellé, solveur, pondérations) ; au-delà, variantes tirées au hasard
+SCENARIO_PRESETS = [
+    ("V1 (ordre d'origine)", "greedy", None),
+    ("Optimisé", "optimal", None),
+    ("Priorité heures contrat", "optimal", {"hours": 5.0, "weekend": 5.0}),
+    ("Priorité week-ends", "optimal", {"hours": 0.2, "weekend": 50.0}),
+]
+
+
+@dataclass
+class Scenario:
+    id: int
+    label: str
+    solver: str
+    seed: int | None
+    weights: dict | None
+    blocks: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+    score: dict = field(default_factory=dict)
+    seconds: float = 0.0
+    error: str | None = None  # échec ou hors délai : pas de planning
+
+
+def scenario_specs(k: int, seed: int = 0) -> list:
+    """K scénarios : les préréglages, puis des ordres et pondérations aléatoires."""
+    rng = random.Random(seed)
+    specs = []
+    for i in range(k):
+        if i < len(SCENARIO_PRESETS):
+            label, solver, weights = SCENARIO_PRESETS[i]
+            shuffle = None if i == 0 else rng.randrange(1 << 30)
+        else:
+            label, solver = f"Variante {i - len(SCENARIO_PRESETS) + 1}", "optimal"
+            weights = {
+                "hours": round(rng.uniform(0.2, 5.0), 2),
+                "weekend": round(rng.uniform(5.0, 50.0), 1),
+            }
+            shuffle = rng.randrange(1 << 30)
+        specs.append(Scenario(id=i, label=label, solver=solver, seed=shuffle, weights=weights))
+    return specs
+
+
+def score_planning(blocks: list, contract_hours: dict, carry_over: dict | None = None) -> dict:
+    """Note d'un planning ; "cost" (plus bas = meilleur) départage à couverture égale."""
+    targets = monthly_targets(contract_hours, carry_over)
+    hours = defaultdict(int)
+    weekends = defaultdict(int)
+    covered = 0
+    for block in blocks:
+        if block.assigned_to is None:
+            continue
+        covered += 1
+        hours[block.assigned_to] += block.hours
+        weekends[block.assigned_to] += block.type == "weekend"
+
+    hours_gap = sum(
+        abs(hours[email] - target)
+        for email, target in targets.items()
+        if target is not None
+    )
+    weekend_sq = sum(n * n for n in weekends.values())
+
+    return {
+        "coverage": covered / len(blocks) if blocks else 1.0,
+        "uncovered": len(blocks) - covered,
+        "hours_gap": hours_gap,
+        "weekend_max": max(weekends.values(), default=0),
+        "cost": DEFAULT_WEIGHTS["hours"] * hours_gap + DEFAULT_WEIGHTS["weekend"] * weekend_sq,
+    }
+
+
+def generate_scenarios(
+    *,
+    year: int,
+    month: int,
+    users: dict,
+    availability_by_user: dict,
+    contract_hours: dict,
+    k: int = 4,
+    seed: int = 0,
+    time_budget: float = 0.3,
+    carry_over: dict | None = None,
+    max_workers: int = 1,
+    timeout: float | None = None,
+) -> list:
+    """
+    Génère et note K scénarios, triés du meilleur au moins bon
+    (couverture, puis coût), sans doublon ; les scénarios en échec
+    (exception ou hors délai) suivent, avec leur `error`.
+
+    time_budget : limite de la recherche locale, par scénario
+    timeout     : limite globale (défaut : 4 × time_budget + 5 s) ;
+                  les processus encore actifs sont alors arrêtés
+    max_workers : taille du pool de processus ; 1 (défaut) = dans le
+                  processus appelant, le plus rapide pour un mois
+                  ordinaire. Le pool (spawn) réimporte le module __main__
+                  de l'appelant : à réserver aux scripts protégés par
+                  `if __name__ == "__main__"`, pas à l'application Streamlit.
+    """
+    specs = scenario_specs(k, seed)
+    tasks = [
+        (spec, year, month, users, availability_by_user, contract_hours, time_budget, carry_over)
+        for spec in specs
+    ]
+
+    workers = max(1, min(max_workers, len(tasks)))
+    scenarios, failed = [], []
+    if workers == 1:
+        for spec, task in zip(specs, tasks):
+            try:
+                scenarios.append(_run_scenario(task))
+            except Exception as e:
+                spec.error = repr(e)
+                failed.append(spec)
+    else:
+        if timeout is None:
+            timeout = 4 * time_budget + 5.0
+        pool = _get_pool(workers)
+        results = [pool.apply_async(_run_scenario, (task,)) for task in tasks]
+        deadline = time.monotonic() + timeout
+        expired = False
+        for spec, result in zip(specs, results):
+            result.wait(max(0.0, deadline - time.monotonic()))
+            if not result.ready():
+                spec.error = f"hors délai ({timeout:.1f} s)"
+                failed.append(spec)
+                expired = True
+                continue
+            try:
+                scenarios.append(result.get())
+            except Exception as e:
+                spec.error = repr(e)
+                failed.append(spec)
+        if expired:
+            # Processus encore en calcul : arrêtés, le pool suivant repart à neuf
+            shutdown_scenario_pool()
+
+    # Meilleur d'abord ; un planning identique à un mieux classé est écarté
+    unique, seen = [], set()
+    for scenario in sorted(scenarios, key=lambda s: (-s.score["coverage"], s.score["cost"], s.id)):
+        assignment = tuple(b.assigned_to for b in scenario.blocks)
+        if assignment not in seen:
+            seen.add(assignment)
+            unique.append(scenario)
+    return unique + failed
+
+
+# ================= POOL DE PROCESSUS =================
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int):
+    """Pool du module, démarré une fois et réutilisé d'un appel à l'autre."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is not None and _pool_size != workers:
+            _pool.terminate()
+            _pool = None
+        if _pool is None:
+            # spawn : pas de fork d'un serveur multi-thread (réplica…)
+            _pool = multiprocessing.get_context("spawn").Pool(workers)
+            _pool_size = workers
+        return _pool
+
+
+def shutdown_scenario_pool():
+    """Arrête les processus du pool (calculs en cours compris)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool.join()
+            _pool = None
+
+
+atexit.register(shutdown_scenario_pool)
+
+
+def _run_scenario(task) -> Scenario:
+    spec, year, month, users, availability_by_user, contract_hours, time_budget, carry_over = task
+
+    # Ordre des utilisateurs : il départage le glouton et la couverture max
+    if spec.seed is not None:
+        order = list(availability_by_user)
+        random.Random(spec.seed).shuffle(order)
+        availability_by_user = {email: availability_by_user[email] for email in order}
+
+    started = time.perf_counter()
+    result = generate_planning(
+        year=year,
+        month=month,
+        users=users,
+        availability_by_user=availability_by_user,
+        contract_hours=contract_hours,
+        solver=spec.solver,
+        time_budget=time_budget,
+        weights=spec.weights,
+        carry_over=carry_over,
+    )
+    spec.seconds = time.perf_counter() - started
+    spec.blocks = result["blocks"]
+    spec.warnings = result["warnings"]
+    spec.score = score_planning(spec.blocks, contract_hours, carry_over)
+    return spec
@@ -1,19 +1,113 @@
+import io
+import os
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 
 from firebase_client import (
     login_user, logout_user, is_admin,
     load_availability, save_availability,
-    get_all_users,
+    load_all_availability,
+    load_admin_bundle,
+    replica_status,
     is_planning_locked,
     lock_planning,
-    load_locked_planning
+    amend_locked_planning
 )
 
-from components.calendar_availability import availability_calendar
-from planner_engine import generate_planning
+from components.calendar_availability import availability_calendar, flush_pending_availability
+from components.calendar_grid import team_matrix_html
+from components.diagnostics_panel import diagnostics_panel, start_rerun_diagnostics
+from planner_engine import changed_cells, replan_incremental
+from planning_cache import cached_generate_planning, planning_fingerprint
+from planner_scenarios import generate_scenarios
+from planning_blocks import assigned_hours, blocks_to_frame, pack_blocks, unpack_blocks
+from exporters import block_rows, write_csv, write_ical
+from feasibility import analyze_coverage
+from hours_ledger import OPENING_FILE, HoursLedger
+from instrumentation import end_rerun, timed
+from month_template import month_template
 
 st.set_page_config(page_title="Planning IA RH", layout="wide")
+start_rerun_diagnostics("planning_app")
+
+
+APP_DIR = Path(__file__).parent
+LEDGER_DIR = Path(os.environ.get("PLANNING_LEDGER_DIR", Path.home() / ".planning_ia_rh"))
+
+
+@st.cache_resource
+def get_hours_ledger(directory):
+    # Une instance par répertoire ; solde d'ouverture livré avec l'application
+    return HoursLedger(directory, opening_file=APP_DIR / OPENING_FILE)
+
+
+def amend_absence(year, month, users, locked_planning, availability_by_user, ledger):
+    """Réparation locale d'un planning verrouillé après une absence."""
+    names = {u: info.get("name", u) for u, info in users.items()}
+    template = month_template(year, month)
+
+    with st.form("amend_form"):
+        absent = st.selectbox("Collaborateur absent", list(users), format_func=names.get)
+        period = st.date_input(
+            "Période d'absence",
+            value=(template.first_day, template.first_day),
+            min_value=template.first_day,
+            max_value=template.last_day,
+        )
+        submitted = st.form_submit_button("🔍 Calculer la réparation")
+
+    if submitted and len(period) == 2:
+        updated = dict(availability_by_user)
+        updated[absent] = {
+            **availability_by_user.get(absent, {}),
+            **{d.isoformat(): False for d in template.days if period[0] <= d <= period[1]},
+        }
+        repair = replan_incremental(
+            year=year,
+            month=month,
+            previous=unpack_blocks(locked_planning["blocks"]),
+            availability_by_user=updated,
+            changes=changed_cells(availability_by_user, updated),
+        )
+        st.session_state.amend_proposal = {
+            "month": (year, month),
+            "repair": repair,
+            "absence": {"email": absent, "from": period[0].isoformat(), "to": period[1].isoformat()},
+        }
+
+    proposal = st.session_state.get("amend_proposal")
+    if not proposal or proposal["month"] != (year, month):
+        return
+
+    changes = proposal["repair"]["changes"]
+    if not changes:
+        st.success("✅ Aucun bloc impacté par cette absence")
+        return
+
+    st.dataframe(pd.DataFrame([
+        {
+            "Semaine": c["week"],
+            "Bloc": c["type"],
+            "Avant": names.get(c["from"], "❌ NON COUVERT") if c["from"] else "❌ NON COUVERT",
+            "Après": names.get(c["to"], "❌ NON COUVERT") if c["to"] else "❌ NON COUVERT",
+        }
+        for c in changes
+    ]), use_container_width=True)
+
+    if st.button("✅ Appliquer l'amendement"):
+        blocks = proposal["repair"]["blocks"]
+        hours = assigned_hours(blocks)
+        amend_locked_planning(
+            year, month,
+            planning_data={"blocks": pack_blocks(blocks), "hours_by_user": hours},
+            amendment={"absence": proposal["absence"], "changes": changes},
+        )
+        ledger.record_period(year, month, hours)
+        del st.session_state.amend_proposal
+        st.success(f"🩹 Planning {month:02d}/{year} amendé : {len(changes)} bloc(s) réaffecté(s)")
+
 
 # ================= SESSION =================
 if "auth_user" not in st.session_state:
@@ -30,6 +124,7 @@ def login_screen():
     if st.button("Se connecter"):
         if login_user(email, password):
             st.success("Connexion réussie")
+            end_rerun()
             st.rerun()
         else:
             st.error("Identifiants incorrects")
@@ -37,6 +132,7 @@ def login_screen():
 
 if st.session_state.auth_user is None:
     login_screen()
+    end_rerun()
     st.stop()
 
 
@@ -46,8 +142,14 @@ admin = is_admin()
 
 st.success(f"Connecté : **{email}** — {'Admin' if admin else 'Utilisateur'}")
 
+if admin:
+    with st.sidebar:
+        diagnostics_panel()
+
 if st.button("Se déconnecter"):
+    flush_pending_availability(save_availability, load_availability)
     logout_user()
+    end_rerun()
     st.rerun()
 
 
@@ -77,29 +179,52 @@ with tab1:
 with tab2:
     if not admin:
         st.warning("Accès réservé à l’administrateur")
+        end_rerun()
         st.stop()
 
     st.header("👥 Disponibilités équipe")
 
+    replica = replica_status()
+    if replica is not None:
+        age = replica["staleness"]
+        st.caption(
+            f"🛰️ Réplica {'temps réel' if replica['mode'] == 'listener' else 'par interrogation'} — "
+            + ("à jour" if age is not None and age < 5 else f"dernière synchronisation il y a {age:.0f} s")
+        )
+
     year_admin = st.selectbox("Année (Admin)", [2026, 2027], index=0, key="admin_year")
     month_admin = st.selectbox("Mois (Admin)", list(range(1, 13)), index=2, key="admin_month")
 
-    users = get_all_users()
+    # ===== COLLECTE DES DONNÉES (lectures en parallèle) =====
+    # Mois affichés : le mois choisi, plus les suivants de la vue équipe
+    n_months = int(st.session_state.get("team_months", 1)) if st.session_state.get("team_view") else 1
+    months_admin = [
+        (year_admin + (month_admin - 1 + i) // 12, (month_admin - 1 + i) % 12 + 1)
+        for i in range(n_months)
+    ]
+    bundle = load_admin_bundle(months_admin)
+    users = bundle.users
 
     if not users:
         st.info("Aucun utilisateur enregistré")
+        end_rerun()
         st.stop()
 
-    # ===== COLLECTE DES DONNÉES =====
-    availability_by_user = {}
+    locked_planning = bundle.plannings[(year_admin, month_admin)] or {}
+    if bundle.locked[(year_admin, month_admin)]:
+        st.info(
+            f"🔒 Planning {month_admin:02d}/{year_admin} déjà validé "
+            f"({len(locked_planning.get('blocks', {}).get('id', []))} blocs)"
+        )
+
+    availability_by_user = bundle.availability[(year_admin, month_admin)]
     contract_hours = {}
     table_data = []
 
     for u_email, info in users.items():
-        avail = load_availability(u_email, year_admin, month_admin)
+        avail = availability_by_user[u_email]
         dispo_days = [d for d, v in avail.items() if v is True]
 
-        availability_by_user[u_email] = avail
         contract_hours[u_email] = info.get("contract_hours", 0)
 
         table_data.append({
@@ -108,9 +233,63 @@ with tab2:
             "Jours disponibles": len(dispo_days)
         })
 
+    ledger = get_hours_ledger(str(LEDGER_DIR))
+    # cumul_heures.json est indexé par nom : {nom: email}
+    ledger.set_aliases({info["name"]: u_email for u_email, info in users.items() if info.get("name")})
+    ledger.refresh()  # une relecture du journal par rerun, puis lectures en mémoire
+    carry_over = ledger.carry_over(contract_hours, year_admin, month_admin)
+
+    def inputs_fingerprint(availability, params):
+        # Empreinte des entrées du solveur (cf. planning_cache)
+        return planning_fingerprint(
+            year=year_admin,
+            month=month_admin,
+            users=users,
+            availability_by_user=availability,
+            contract_hours=contract_hours,
+            carry_over=carry_over,
+            **params,
+        )
+
+    # ===== PLANNING VALIDÉ PÉRIMÉ ? =====
+    if locked_planning.get("fingerprint") and locked_planning["fingerprint"] != inputs_fingerprint(
+        availability_by_user, locked_planning.get("params", {})
+    ):
+        st.warning(
+            "⚠️ Les données ont changé depuis la validation "
+            "(disponibilités, équipe, heures contrat ou report d'heures)."
+        )
+
+    # ===== ABSENCE SUR PLANNING VALIDÉ =====
+    if bundle.locked[(year_admin, month_admin)] and locked_planning.get("blocks"):
+        with st.expander("🩹 Absence imprévue — amender le planning validé"):
+            amend_absence(year_admin, month_admin, users, locked_planning, availability_by_user, ledger)
+
     st.subheader("📊 Synthèse des disponibilités")
     st.dataframe(pd.DataFrame(table_data), use_container_width=True)
 
+    # ===== VUE ÉQUIPE (personnes × jours) =====
+    if st.toggle("🗓️ Vue équipe (personnes × jours)", key="team_view"):
+        col_months, col_filter = st.columns([1, 2])
+        col_months.number_input("Nombre de mois", 1, 6, 1, key="team_months")
+        name_filter = col_filter.text_input("Filtrer par nom", key="team_filter").strip().lower()
+
+        with timed("render", "team_matrix"):
+            team_availability = {u: dict(avail) for u, avail in availability_by_user.items()}
+            for y, m in months_admin[1:]:
+                month_availability = bundle.availability.get((y, m))
+                if month_availability is None:
+                    month_availability = load_all_availability(y, m, users=users)
+                for u, avail in month_availability.items():
+                    team_availability[u].update(avail)
+
+            rows = [
+                (row["Nom"], team_availability[row["Email"]])
+                for row in table_data
+                if name_filter in row["Nom"].lower()
+            ]
+            st.markdown(team_matrix_html(months_admin, rows), unsafe_allow_html=True)
+
     # ===== VÉRIFICATION GLOBALE =====
     total_dispos = sum(
         sum(1 for v in avail.values() if v is True)
@@ -122,61 +301,198 @@ with tab2:
             "⚠️ Aucune disponibilité renseignée pour ce mois.\n\n"
             "Le planning ne peut pas être généré."
         )
+        end_rerun()
         st.stop()
 
+    # ===== FAISABILITÉ (avant génération) =====
+    feasibility = analyze_coverage(year_admin, month_admin, availability_by_user)
+    if feasibility.feasible:
+        st.success(f"✅ Couverture complète atteignable ({feasibility.blocks}/{feasibility.blocks} blocs)")
+    else:
+        st.warning(
+            f"⚠️ Couverture maximale atteignable : {feasibility.max_covered}/{feasibility.blocks} blocs "
+            f"({len(feasibility.no_candidate)} bloc(s) sans aucun candidat)"
+        )
+        names = {u: info.get("name", u) for u, info in users.items()}
+        template = month_template(year_admin, month_admin)
+        gap_rows = []
+        for gap in feasibility.gaps:
+            spec = template.blocks[gap.block]
+            gap_rows.append({
+                "Semaine": spec.week,
+                "Bloc": "Lundi → Jeudi" if spec.type == "week" else "Vendredi → Dimanche",
+                "Du": spec.start.strftime("%d/%m"),
+                "Au": spec.end.strftime("%d/%m"),
+                "Candidats": ", ".join(names.get(u, u) for u in gap.candidates) or "aucun",
+                "À relancer": " ; ".join(
+                    f"{names.get(fix.email, fix.email)} (+{len(fix.days)} j"
+                    + (f", dont {fix.unavailable} indispo" if fix.unavailable else "")
+                    + ")"
+                    for fix in gap.fixes
+                ),
+            })
+        st.dataframe(pd.DataFrame(gap_rows), use_container_width=True, hide_index=True)
+
     st.divider()
     st.subheader("🧠 Génération du planning")
 
+    solver_mode = st.radio(
+        "Mode de résolution",
+        ["greedy", "optimal"],
+        format_func=lambda m: "Simple (V1)" if m == "greedy" else "Optimisé (couverture + heures contrat)",
+        horizontal=True,
+        key="solver_mode"
+    )
+
     # ===== GÉNÉRATION =====
     if st.button("🚀 Générer le planning (aperçu)"):
-        result = generate_planning(
+        # Entrées identiques (rerun, double clic) : résultat servi par le cache
+        result = cached_generate_planning(
             year=year_admin,
             month=month_admin,
             users=users,
             availability_by_user=availability_by_user,
-            contract_hours=contract_hours
+            contract_hours=contract_hours,
+            solver=solver_mode,
+            carry_over=carry_over
         )
 
         st.session_state.generated_planning = result
+        # Disponibilités et options utilisées : base de la réparation
+        # incrémentale et de l'empreinte enregistrée à la validation
+        st.session_state.generated_source = {
+            "month": (year_admin, month_admin),
+            "availability": availability_by_user,
+            "params": {"solver": solver_mode},
+        }
         st.success("Planning généré (aperçu)")
 
+    # ===== SCÉNARIOS =====
+    with st.expander("🎲 Scénarios : plusieurs plannings comparés"):
+        with st.form("scenarios_form"):
+            k = st.slider("Nombre de scénarios", 2, 8, 4)
+            scenarios_submitted = st.form_submit_button("🎲 Générer les scénarios")
+
+        if scenarios_submitted:
+            with timed("solver", "scenarios"):
+                st.session_state.scenarios = {
+                    "month": (year_admin, month_admin),
+                    "list": generate_scenarios(
+                        year=year_admin,
+                        month=month_admin,
+                        users=users,
+                        availability_by_user=availability_by_user,
+                        contract_hours=contract_hours,
+                        k=k,
+                        carry_over=carry_over,
+                    ),
+                }
+
+        scenarios = st.session_state.get("scenarios")
+        if scenarios and scenarios["month"] == (year_admin, month_admin):
+            names = {u: info.get("name", u) for u, info in users.items()}
+            cols = st.columns(min(4, len(scenarios["list"])))
+            for i, scenario in enumerate(scenarios["list"]):
+                col = cols[i % len(cols)]
+                col.markdown(f"**{scenario.label}**")
+                if scenario.error:
+                    col.error(f"❌ Échec : {scenario.error}")
+                    continue
+                col.metric("Couverture", f"{scenario.score['coverage']:.0%}")
+                col.metric("Écart heures contrat", f"{scenario.score['hours_gap']} h")
+                col.metric("Week-ends max / pers.", scenario.score["weekend_max"])
+                col.dataframe(pd.DataFrame({
+                    "Bloc": [f"S{b.week} {'B1' if b.type == 'week' else 'B2'}" for b in scenario.blocks],
+                    "Affecté à": [names.get(b.assigned_to, "❌") if b.assigned_to else "❌" for b in scenario.blocks],
+                }), hide_index=True, use_container_width=True)
+                col.caption(f"{scenario.seconds * 1000:.0f} ms")
+
+                if col.button("✅ Choisir", key=f"pick-scenario-{scenario.id}"):
+                    st.session_state.generated_planning = {
+                        "blocks": scenario.blocks,
+                        "warnings": scenario.warnings,
+                    }
+                    st.session_state.generated_source = {
+                        "month": (year_admin, month_admin),
+                        "availability": availability_by_user,
+                        "params": {"solver": scenario.solver, "weights": scenario.weights},
+                    }
+                    st.success(f"Scénario « {scenario.label} » retenu (aperçu)")
+
     # ===== AFFICHAGE =====
-    if "generated_planning" in st.session_state:
+    # Aperçu montré (et verrouillable) uniquement pour le mois où il a été généré
+    source = st.session_state.get("generated_source")
+    if "generated_planning" in st.session_state and source and source["month"] != (year_admin, month_admin):
+        generated_year, generated_month = source["month"]
+        st.info(
+            f"ℹ️ L'aperçu en cours concerne {generated_month:02d}/{generated_year} : "
+            f"générez un planning pour {month_admin:02d}/{year_admin}."
+        )
+
+    elif "generated_planning" in st.session_state and source:
         result = st.session_state.generated_planning
 
         st.divider()
         st.subheader("📅 Aperçu du planning")
 
-        blocks_data = []
-        hours_by_user = {}
-
-        for b in result["blocks"]:
-            user_assigned = b["assigned_to"]
-
-            if user_assigned:
-                hours_by_user[user_assigned] = (
-                    hours_by_user.get(user_assigned, 0) + b["hours"]
+        # ===== RÉPARATION INCRÉMENTALE =====
+        cells = changed_cells(source["availability"], availability_by_user)
+        if cells:
+            st.info(f"✏️ {len(cells)} disponibilité(s) modifiée(s) depuis la génération")
+            if st.button("♻️ Réparer l'aperçu (blocs concernés uniquement)"):
+                repair = replan_incremental(
+                    year=year_admin,
+                    month=month_admin,
+                    previous=result["blocks"],
+                    availability_by_user=availability_by_user,
+                    changes=cells,
                 )
-
-            blocks_data.append({
-                "Semaine": b["week"],
-                "Bloc": "Lundi → Jeudi" if b["type"] == "week" else "Vendredi → Dimanche",
-                "Du": b["start"].strftime("%d/%m"),
-                "Au": b["end"].strftime("%d/%m"),
-                "Affecté à": (
-                    users[user_assigned]["name"]
-                    if user_assigned else "❌ NON COUVERT"
-                ),
-                "Heures": b["hours"],
-                "Statut": b["status"]
+                result = {"blocks": repair["blocks"], "warnings": repair["warnings"]}
+                st.session_state.generated_planning = result
+                source["availability"] = availability_by_user
+                st.success(f"♻️ {len(repair['changes'])} bloc(s) réaffecté(s)")
+
+        with timed("render", "preview_frame"):
+            frame = blocks_to_frame(result["blocks"])
+            names = {u: info.get("name", u) for u, info in users.items()}
+
+            hours_by_user = assigned_hours(result["blocks"])
+
+            blocks_data = pd.DataFrame({
+                "Semaine": frame["week"],
+                "Bloc": frame["type"].map({"week": "Lundi → Jeudi", "weekend": "Vendredi → Dimanche"}),
+                "Du": frame["start"].dt.strftime("%d/%m"),
+                "Au": frame["end"].dt.strftime("%d/%m"),
+                "Affecté à": frame["assigned_to"].map(names).fillna("❌ NON COUVERT"),
+                "Heures": frame["hours"],
+                "Statut": frame["status"]
             })
 
-        st.dataframe(pd.DataFrame(blocks_data), use_container_width=True)
+        st.dataframe(blocks_data, use_container_width=True)
+
+        csv_buffer, ics_buffer = io.StringIO(), io.StringIO()
+        write_csv(block_rows(result["blocks"], names), csv_buffer)
+        write_ical(block_rows(result["blocks"], names), ics_buffer)
+
+        col_csv, col_ics = st.columns(2)
+        col_csv.download_button(
+            "⬇️ Export CSV", csv_buffer.getvalue(),
+            file_name=f"planning_{year_admin}_{month_admin:02d}.csv", mime="text/csv"
+        )
+        col_ics.download_button(
+            "⬇️ Export iCal", ics_buffer.getvalue(),
+            file_name=f"planning_{year_admin}_{month_admin:02d}.ics", mime="text/calendar"
+        )
 
         # ===== HEURES =====
         st.subheader("⏱ Heures par collaborateur")
+        year_hours, total_hours = ledger.year_totals(year_admin), ledger.totals()
         for u, h in hours_by_user.items():
-            st.write(f"• {users[u]['name']} : **{h} h**")
+            st.write(
+                f"• {users[u]['name']} : **{h} h** "
+                f"(cumul {year_admin} : {year_hours.get(u, 0)} h, "
+                f"total : {total_hours.get(u, 0)} h)"
+            )
 
         # ===== ALERTES RH =====
         if result["warnings"]:
@@ -190,14 +506,23 @@ with tab2:
         st.subheader("🔒 Validation définitive")
 
         if st.button("🔒 Valider et verrouiller le planning"):
+            params = source["params"]
             lock_planning(
                 year_admin,
                 month_admin,
-                planning_data=result["blocks"],
-                hours_by_user=hours_by_user
+                planning_data={
+                    "blocks": pack_blocks(result["blocks"]),
+                    "hours_by_user": hours_by_user,
+                    # Entrées d'origine : détection d'un planning périmé
+                    "fingerprint": inputs_fingerprint(source["availability"], params),
+                    "params": params,
+                }
             )
+            ledger.record_period(year_admin, month_admin, hours_by_user)
 
             st.success(
                 f"🔒 Planning {month_admin:02d}/{year_admin} VALIDÉ\n"
                 "Les disponibilités sont désormais verrouillées."
-            )
\ No newline at end of file
+            )
+
+end_rerun()
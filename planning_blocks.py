@@ -0,0 +1,106 @@
+import datetime as dt
+from dataclasses import dataclass
+
+# ============================================================
+# MODÈLE DE BLOC
+# ============================================================
+# Un bloc = une période (semaine Lun → Jeu, ou week-end Ven → Dim)
+# confiée à une seule personne. Classe à __slots__ : pas de dict par
+# bloc, et conversion par colonnes vers pandas / le stockage.
+# ============================================================
+
+BLOCK_TYPES = ("week", "weekend")
+
+
+@dataclass(slots=True)
+class Block:
+    id: int
+    week: int
+    type: str
+    start: dt.date
+    end: dt.date
+    hours: int
+    assigned_to: str | None = None
+    status: str = "unassigned"
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+    def assign(self, email: str | None):
+        self.assigned_to = email
+        self.status = "assigned" if email is not None else "unassigned"
+
+
+def assigned_hours(blocks: list) -> dict:
+    """{email: heures} des blocs affectés."""
+    hours = {}
+    for block in blocks:
+        if block.assigned_to:
+            hours[block.assigned_to] = hours.get(block.assigned_to, 0) + block.hours
+    return hours
+
+
+def blocks_to_columns(blocks: list) -> dict:
+    """Colonnes {champ: [valeurs]} en un seul passage sur les blocs."""
+    columns = {name: [] for name in Block.__slots__}
+    for block in blocks:
+        for name, values in columns.items():
+            values.append(getattr(block, name))
+    return columns
+
+
+def blocks_to_frame(blocks: list):
+    """DataFrame des blocs (start / end en datetime64)."""
+    import pandas as pd
+
+    frame = pd.DataFrame(blocks_to_columns(blocks), columns=list(Block.__slots__))
+    frame["start"] = pd.to_datetime(frame["start"])
+    frame["end"] = pd.to_datetime(frame["end"])
+    return frame
+
+
+# =======================
+# Sérialisation compacte
+# =======================
+# Format colonne (compatible Firestore : ni dates ni objets) :
+# {"v": 1, "origin": "AAAA-MM-JJ", "id": [...], "week": [...],
+#  "type": "wewe…" (w = week, e = weekend), "start": [décalage jours],
+#  "end": [décalage jours], "hours": [...], "assigned_to": [...]}
+
+PACK_VERSION = 1
+
+
+def pack_blocks(blocks: list) -> dict:
+    origin = min((b.start for b in blocks), default=dt.date(1970, 1, 1))
+    return {
+        "v": PACK_VERSION,
+        "origin": origin.isoformat(),
+        "id": [b.id for b in blocks],
+        "week": [b.week for b in blocks],
+        "type": "".join("w" if b.type == "week" else "e" for b in blocks),
+        "start": [(b.start - origin).days for b in blocks],
+        "end": [(b.end - origin).days for b in blocks],
+        "hours": [b.hours for b in blocks],
+        "assigned_to": [b.assigned_to for b in blocks],
+    }
+
+
+def unpack_blocks(data: dict) -> list:
+    if data.get("v") != PACK_VERSION:
+        raise ValueError(f"Format de blocs inconnu : {data.get('v')!r}")
+
+    origin = dt.date.fromisoformat(data["origin"])
+    blocks = []
+    for i, kind in enumerate(data["type"]):
+        block = Block(
+            id=data["id"][i],
+            week=data["week"][i],
+            type="week" if kind == "w" else "weekend",
+            start=origin + dt.timedelta(days=data["start"][i]),
+            end=origin + dt.timedelta(days=data["end"][i]),
+            hours=data["hours"][i],
+        )
+        block.assign(data["assigned_to"][i])
+        blocks.append(block)
+    return blocks
@@ -0,0 +1,197 @@
+"""
+Cache des résultats de generate_planning, adressé par contenu.
+
+L'empreinte (sha256) couvre exactement ce que voit le solveur : mois,
+ordre des utilisateurs et masque de disponibilités de chacun, heures
+contrat, report d'heures et options du solveur. Deux niveaux :
+- un LRU en mémoire (par processus) ;
+- un répertoire facultatif ($PLANNING_CACHE_DIR), un fichier JSON par
+  empreinte, purgé par taille (les moins récemment utilisés d'abord).
+
+Les résultats sont stockés au format pack_blocks : chaque lecture rend
+des blocs neufs, que l'appelant peut modifier sans risque.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from planner_engine import DEFAULT_WEIGHTS, build_availability_index, generate_planning
+from planning_blocks import pack_blocks, unpack_blocks
+
+# À incrémenter quand le comportement d'un solveur change : les entrées
+# sur disque des versions précédentes ne sont plus jamais relues.
+SOLVER_VERSION = 1
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def planning_fingerprint(
+    *,
+    year: int,
+    month: int,
+    users: dict,
+    availability_by_user: dict,
+    contract_hours: dict,
+    solver: str = "greedy",
+    time_budget: float = 0.5,
+    weights: dict | None = None,
+    carry_over: dict | None = None,
+) -> str:
+    """Empreinte stable des entrées de generate_planning (mêmes arguments)."""
+    index = build_availability_index(year, month, availability_by_user)
+    payload = {
+        "v": SOLVER_VERSION,
+        "month": [year, month],
+        "users": list(users),
+        # L'ordre compte (glouton) : liste, pas dict trié
+        "availability": [[email, mask] for email, mask in index.items()],
+        "contract_hours": sorted((contract_hours or {}).items()),
+        "carry_over": sorted((carry_over or {}).items()),
+        "solver": solver,
+        "time_budget": time_budget if solver != "greedy" else None,
+        "weights": sorted({**DEFAULT_WEIGHTS, **(weights or {})}.items()),
+    }
+    canonical = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PlanningCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()  # empreinte → résultat empaqueté
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, fingerprint: str):
+        """Résultat {"blocks", "warnings"} (blocs neufs), ou None."""
+        with self._lock:
+            packed = self._memory.get(fingerprint)
+            if packed is not None:
+                self._memory.move_to_end(fingerprint)
+                self.hits += 1
+                return _unpack(packed)
+
+        packed = self._read_disk(fingerprint)
+        with self._lock:
+            if packed is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(fingerprint, packed)
+        return _unpack(packed)
+
+    def put(self, fingerprint: str, result: dict):
+        packed = {"blocks": pack_blocks(result["blocks"]), "warnings": list(result["warnings"])}
+        with self._lock:
+            self._remember(fingerprint, packed)
+        self._write_disk(fingerprint, packed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._memory)
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": entries,
+            "disk_bytes": sum(f.stat().st_size for f in self._disk_files()),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for f in self._disk_files():
+            f.unlink(missing_ok=True)
+
+    # ================= MÉMOIRE =================
+    def _remember(self, fingerprint, packed):
+        self._memory[fingerprint] = packed
+        self._memory.move_to_end(fingerprint)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ================= DISQUE =================
+    def _disk_files(self):
+        return list(self.directory.glob("*.json")) if self.directory else []
+
+    def _read_disk(self, fingerprint):
+        if not self.directory:
+            return None
+        path = self.directory / f"{fingerprint}.json"
+        try:
+            packed = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # récemment utilisé : évincé en dernier
+        return packed
+
+    def _write_disk(self, fingerprint, packed):
+        if not self.directory:
+            return
+        path = self.directory / f"{fingerprint}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(packed, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        for f in self._disk_files():
+            try:
+                st = f.stat()
+            except FileNotFoundError:  # évincé par un autre processus
+                continue
+            files.append((st.st_mtime, st.st_size, f))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, f in sorted(files, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+
+
+def _unpack(packed):
+    return {"blocks": unpack_blocks(packed["blocks"]), "warnings": list(packed["warnings"])}
+
+
+# ================= CACHE PAR DÉFAUT =================
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_planning_cache() -> PlanningCache:
+    """Cache du processus ; niveau disque si $PLANNING_CACHE_DIR est défini."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PlanningCache(directory=os.environ.get("PLANNING_CACHE_DIR"))
+        return _default_cache
+
+
+def cached_generate_planning(*, cache: PlanningCache | None = None, **kwargs) -> dict:
+    """
+    generate_planning mémoïsé (mêmes arguments nommés). Le résultat porte
+    aussi son "fingerprint", à enregistrer avec le planning validé.
+    """
+    cache = cache or get_planning_cache()
+    fingerprint = planning_fingerprint(**kwargs)
+
+    result = cache.get(fingerprint)
+    if result is None:
+        result = generate_planning(**kwargs)
+        cache.put(fingerprint, result)
+
+    return {**result, "fingerprint": fingerprint}
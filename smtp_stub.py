@@ -0,0 +1,137 @@
+"""
+Serveur SMTP local minimal pour tester email_client.send_bulk sans
+réseau (pas de TLS : utiliser use_ssl=False).
+
+    with SMTPStub(transient_failures=2) as stub:
+        send_bulk(msgs, host=stub.host, port=stub.port, use_ssl=False,
+                  credentials=("me@example.com", "secret"))
+        stub.messages, stub.logins, stub.connections
+"""
+
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def readline(self):
+        return self.rfile.readline().decode("utf-8", "replace").rstrip("\r\n")
+
+    def handle(self):
+        stub = self.server.stub
+        stub._count("connections")
+        self.reply("220 localhost SMTP stub")
+        mail_from, rcpts = None, []
+
+        while True:
+            line = self.readline()
+            if not line:
+                break
+            verb, _, arg = line.partition(" ")
+            verb = verb.upper()
+
+            if verb == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250 8BITMIME")
+            elif verb == "HELO":
+                self.reply("250 localhost")
+            elif verb == "AUTH":
+                mechanism, _, initial = arg.partition(" ")
+                if mechanism.upper() == "LOGIN":
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.readline()
+                elif not initial:
+                    self.reply("334 ")
+                    self.readline()
+                stub._count("logins")
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                if stub._take_failure():
+                    self.reply("451 4.3.0 Temporary failure, try again")
+                    continue
+                mail_from, rcpts = arg, []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpts.append(arg)
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.readline()
+                    if data == ".":
+                        break
+                    lines.append(data[1:] if data.startswith("..") else data)
+                with stub._lock:
+                    stub.messages.append({
+                        "from": mail_from,
+                        "to": rcpts,
+                        "data": "\n".join(lines),
+                    })
+                self.reply("250 OK queued")
+            elif verb == "RSET":
+                mail_from, rcpts = None, []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPStub:
+    """
+    transient_failures : nombre de MAIL FROM refusés en 451 (erreur
+    temporaire) avant d'accepter, pour tester les nouveaux essais.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, transient_failures=0):
+        self._lock = threading.Lock()
+        self.messages = []
+        self.logins = 0
+        self.connections = 0
+        self.transient_failures = transient_failures
+
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.stub = self
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def _take_failure(self):
+        with self._lock:
+            if self.transient_failures > 0:
+                self.transient_failures -= 1
+                return True
+            return False
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
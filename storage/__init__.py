@@ -0,0 +1,33 @@
+import os
+
+from storage.base import StorageBackend, PlanningLockedError
+from storage.sqlite_backend import SQLiteBackend
+
+
+def create_backend(url=None):
+    """
+    Backend depuis une URL (par défaut $PLANNING_STORAGE, sinon Firestore) :
+    - "firestore" ($PLANNING_LEGACY_AVAILABILITY=0 : disponibilités v1
+      ignorées, une fois storage.migrate passé)
+    - "sqlite:///base.db" (relatif), "sqlite:////abs/base.db", "sqlite://" (mémoire)
+    """
+    url = url or os.environ.get("PLANNING_STORAGE", "firestore")
+
+    if url == "firestore":
+        from storage.firestore_backend import FirestoreBackend
+        return FirestoreBackend(
+            legacy_reads=os.environ.get("PLANNING_LEGACY_AVAILABILITY", "1") != "0"
+        )
+
+    if url.startswith("sqlite://"):
+        return SQLiteBackend(url[len("sqlite://"):].removeprefix("/") or ":memory:")
+
+    raise ValueError(f"Backend de stockage inconnu : {url!r}")
+
+
+__all__ = [
+    "StorageBackend",
+    "PlanningLockedError",
+    "SQLiteBackend",
+    "create_backend",
+]
@@ -0,0 +1,230 @@
+"""
+Accès asynchrone au stockage, pour les lectures indépendantes.
+
+Deux implémentations de la même interface (lectures seulement) :
+- AsyncFirestoreBackend : client Firestore asynchrone (firestore_async),
+  même schéma que FirestoreBackend ;
+- ThreadedAsyncBackend  : n'importe quel StorageBackend synchrone
+  (SQLite hors ligne, tests…) exécuté dans des threads.
+
+Dans les deux cas, un sémaphore borne le nombre d'appels simultanés.
+load_admin_bundle() regroupe les lectures de la page admin et les lance
+en parallèle ; run() l'exécute depuis du code synchrone (Streamlit).
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+
+from storage.packed_availability import SUBCOLLECTION, legacy_field, period, read_month_document
+
+DEFAULT_CONCURRENCY = 8
+
+
+class ThreadedAsyncBackend:
+    """Interface asynchrone au-dessus d'un StorageBackend synchrone."""
+
+    def __init__(self, backend, concurrency=DEFAULT_CONCURRENCY):
+        self.backend = backend
+        self.concurrency = concurrency
+
+    async def _call(self, name, *args, **kwargs):
+        async with _semaphore(self):
+            return await asyncio.to_thread(getattr(self.backend, name), *args, **kwargs)
+
+    async def get_user(self, email):
+        return await self._call("get_user", email)
+
+    async def list_users(self):
+        return await self._call("list_users")
+
+    async def load_availability(self, email, year, month):
+        return await self._call("load_availability", email, year, month)
+
+    async def load_all_availability(self, year, month, users=None):
+        return await self._call("load_all_availability", year, month, users=users)
+
+    async def is_locked(self, year, month):
+        return await self._call("is_locked", year, month)
+
+    async def load_planning(self, year, month):
+        return await self._call("load_planning", year, month)
+
+
+class AsyncFirestoreBackend:
+    """
+    Lectures Firestore asynchrones, schéma de FirestoreBackend :
+    users/{email}, users/{email}/availability/{y}_{m} (v2),
+    planning_locks/{y}_{m}, plannings/{y}_{m}.
+    """
+
+    def __init__(self, db=None, concurrency=DEFAULT_CONCURRENCY, legacy_reads=True):
+        if db is None:
+            from firebase_admin import firestore_async
+
+            from storage.firestore_backend import init_firebase_app
+
+            init_firebase_app()
+            db = firestore_async.client()
+        self.db = db
+        self.concurrency = concurrency
+        self.legacy_reads = legacy_reads
+        self.users = db.collection("users")
+        self.locks = db.collection("planning_locks")
+        self.plannings = db.collection("plannings")
+
+    async def _get(self, ref):
+        async with _semaphore(self):
+            return await ref.get()
+
+    async def get_user(self, email):
+        doc = await self._get(self.users.document(email))
+        return doc.to_dict() if doc.exists else None
+
+    async def list_users(self):
+        async with _semaphore(self):
+            return {d.id: d.to_dict() async for d in self.users.stream()}
+
+    async def load_availability(self, email, year, month):
+        doc = await self._get(
+            self.users.document(email).collection(SUBCOLLECTION).document(period(year, month))
+        )
+        if doc.exists:
+            return read_month_document(doc.to_dict())
+        if not self.legacy_reads:
+            return {}
+        user = await self.get_user(email)
+        if user is None:
+            return {}
+        return user.get(legacy_field(year, month), {})
+
+    async def load_all_availability(self, year, month, users=None):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        query = self.db.collection_group(SUBCOLLECTION).where(
+            filter=FieldFilter("period", "==", period(year, month))
+        )
+
+        async def packed_months():
+            async with _semaphore(self):
+                return {
+                    d.reference.parent.parent.id: read_month_document(d.to_dict())
+                    async for d in query.stream()
+                }
+
+        if users is None:
+            packed, users = await asyncio.gather(packed_months(), self.list_users())
+        else:
+            packed = await packed_months()
+        field = legacy_field(year, month)
+        return {
+            email: packed[email] if email in packed
+            else info.get(field, {}) if self.legacy_reads
+            else {}
+            for email, info in users.items()
+        }
+
+    async def is_locked(self, year, month):
+        return (await self._get(self.locks.document(f"{year}_{month}"))).exists
+
+    async def load_planning(self, year, month):
+        doc = await self._get(self.plannings.document(f"{year}_{month}"))
+        return doc.to_dict() if doc.exists else None
+
+
+def _semaphore(backend):
+    # Un sémaphore par boucle d'événements (asyncio.Semaphore y est lié).
+    loop = asyncio.get_running_loop()
+    semaphores = backend.__dict__.setdefault("_semaphores", {})
+    if semaphores.get("loop") is not loop:
+        semaphores.clear()
+        semaphores["loop"] = loop
+        semaphores["sem"] = asyncio.Semaphore(backend.concurrency)
+    return semaphores["sem"]
+
+
+# ================= PAGE ADMIN =================
+@dataclass
+class AdminBundle:
+    users: dict
+    locked: dict = field(default_factory=dict)        # {(y, m): bool}
+    plannings: dict = field(default_factory=dict)     # {(y, m): planning | None}
+    availability: dict = field(default_factory=dict)  # {(y, m): {email: dispos}}
+
+
+async def load_admin_bundle(
+    backend, months, *, users=None, locked=None, plannings=None, availability=None
+):
+    """
+    Toutes les lectures de la page admin pour `months` ([(année, mois)]) :
+    utilisateurs, verrous, plannings validés et disponibilités.
+
+    users / locked / plannings / availability : valeurs déjà connues
+    (cache, réplica), non relues.
+    Les lectures indépendantes partent ensemble ; les disponibilités
+    attendent les utilisateurs (Firestore les lit dans leurs documents).
+    """
+    locked = dict(locked or {})
+    plannings = dict(plannings or {})
+    months = list(months)
+
+    missing_locks = [ym for ym in months if ym not in locked]
+    missing_plannings = [ym for ym in months if ym not in plannings]
+
+    async def no_users():
+        return users
+
+    results = await asyncio.gather(
+        backend.list_users() if users is None else no_users(),
+        *(backend.is_locked(y, m) for y, m in missing_locks),
+        *(backend.load_planning(y, m) for y, m in missing_plannings),
+    )
+    users = results[0]
+    locked.update(zip(missing_locks, results[1:1 + len(missing_locks)]))
+    plannings.update(zip(missing_plannings, results[1 + len(missing_locks):]))
+
+    availability = dict(availability or {})
+    missing_availability = [ym for ym in months if ym not in availability]
+    availability.update(zip(missing_availability, await asyncio.gather(
+        *(backend.load_all_availability(y, m, users=users) for y, m in missing_availability)
+    )))
+
+    return AdminBundle(
+        users=users,
+        locked=locked,
+        plannings=plannings,
+        availability=availability,
+    )
+
+
+def run(coro):
+    """
+    Exécute une coroutine depuis du code synchrone, sur une boucle
+    d'événements de fond partagée : le client Firestore asynchrone reste
+    attaché à une seule boucle d'un appel à l'autre.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="storage-async", daemon=True
+            ).start()
+        return _loop
+
+
+def async_backend_for(backend, concurrency=DEFAULT_CONCURRENCY):
+    """Variante asynchrone d'un backend synchrone (Firestore natif, sinon threads)."""
+    from storage.firestore_backend import FirestoreBackend
+
+    if isinstance(backend, FirestoreBackend):
+        return AsyncFirestoreBackend(concurrency=concurrency, legacy_reads=backend.legacy_reads)
+    return ThreadedAsyncBackend(backend, concurrency=concurrency)
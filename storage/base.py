@@ -0,0 +1,70 @@
+from abc import ABC, abstractmethod
+
+
+class PlanningLockedError(PermissionError):
+    """Le planning du mois a été verrouillé : disponibilités figées."""
+
+
+class StorageBackend(ABC):
+    """
+    Stockage des utilisateurs, disponibilités, verrous et plannings.
+
+    Conventions (celles des documents Firestore historiques) :
+    - un utilisateur = un dict (name, admin, contract_hours, ...)
+    - une disponibilité mensuelle = {"AAAA-MM-JJ": True/False}
+    - un mois = (year, month)
+    """
+
+    # ================= USERS =================
+    @abstractmethod
+    def get_user(self, email):
+        """Document utilisateur, ou None s'il n'existe pas."""
+
+    @abstractmethod
+    def list_users(self):
+        """{email: document utilisateur}"""
+
+    @abstractmethod
+    def save_user(self, email, data):
+        """Crée ou complète (merge) un document utilisateur."""
+
+    @abstractmethod
+    def get_auth_uid(self, email):
+        """Identifiant du compte d'authentification, ou None."""
+
+    # ================= AVAILABILITÉS =================
+    @abstractmethod
+    def load_availability(self, email, year, month):
+        """Disponibilités d'un utilisateur pour un mois ({} si aucune)."""
+
+    @abstractmethod
+    def load_all_availability(self, year, month, users=None):
+        """
+        {email: disponibilités du mois} pour tous les utilisateurs (ou ceux
+        de `users`, résultat de list_users), en une seule lecture groupée.
+        """
+
+    @abstractmethod
+    def save_availability(self, email, year, month, availability, changed=None):
+        """
+        changed=None : enregistre toute la carte du mois.
+        changed=[jours] : n'écrit que ces jours, en une seule écriture qui
+        lève PlanningLockedError si le mois est verrouillé.
+        """
+
+    # ================= PLANNING LOCK =================
+    @abstractmethod
+    def is_locked(self, year, month):
+        pass
+
+    @abstractmethod
+    def lock_planning(self, year, month, planning_data):
+        """Verrouille le mois et enregistre le planning validé."""
+
+    @abstractmethod
+    def save_planning(self, year, month, planning_data):
+        """Remplace le planning validé d'un mois (amendement), sans toucher au verrou."""
+
+    @abstractmethod
+    def load_planning(self, year, month):
+        """Planning validé du mois, ou None."""
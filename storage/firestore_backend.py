@@ -0,0 +1,215 @@
+import firebase_admin
+from firebase_admin import credentials, auth, firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from storage.base import StorageBackend, PlanningLockedError
+from storage.packed_availability import (
+    SUBCOLLECTION,
+    legacy_field,
+    month_document,
+    parse_period,
+    period,
+    read_month_document,
+)
+
+FIREBASE_SECRET_KEYS = (
+    "type",
+    "project_id",
+    "private_key_id",
+    "private_key",
+    "client_email",
+    "client_id",
+    "auth_uri",
+    "token_uri",
+    "auth_provider_x509_cert_url",
+    "client_x509_cert_url",
+)
+
+
+def init_firebase_app():
+    """Initialise l'application Firebase depuis st.secrets (une seule fois)."""
+    if not firebase_admin._apps:
+        import streamlit as st
+
+        firebase_config = {k: st.secrets["firebase"][k] for k in FIREBASE_SECRET_KEYS}
+        cred = credentials.Certificate(firebase_config)
+        firebase_admin.initialize_app(cred)
+
+
+class FirestoreBackend(StorageBackend):
+    """
+    Schéma :
+    - users/{email}                     : profil (+ availability_{y}_{m}, v1)
+    - users/{email}/availability/{y}_{m}: disponibilités du mois (v2, compact)
+    - planning_locks/{y}_{m}            : {"locked": True}
+    - plannings/{y}_{m}                 : planning validé
+
+    legacy_reads=False : les champs v1 ne sont plus consultés (une fois
+    storage.migrate passé). load_all_availability interroge le groupe de
+    collections "availability" sur "period" : activer l'index de champ
+    unique correspondant (portée groupe de collections).
+    """
+
+    def __init__(self, db=None, legacy_reads=True):
+        if db is None:
+            init_firebase_app()
+            db = firestore.client()
+        self.db = db
+        self.legacy_reads = legacy_reads
+        self.users = db.collection("users")
+        self.locks = db.collection("planning_locks")
+        self.plannings = db.collection("plannings")
+
+    # ================= USERS =================
+    def get_user(self, email):
+        doc = self.users.document(email).get()
+        return doc.to_dict() if doc.exists else None
+
+    def list_users(self):
+        return {d.id: d.to_dict() for d in self.users.stream()}
+
+    def save_user(self, email, data):
+        self.users.document(email).set(data, merge=True)
+
+    def watch_users(self, on_change):
+        """
+        Écoute temps réel de la collection users : on_change({email:
+        document, ou None si supprimé}) à chaque lot de modifications (le
+        premier lot contient toute la collection). Retourne le Watch
+        (.unsubscribe() pour arrêter, .is_active pour l'état).
+        """
+        def callback(snapshot, changes, read_time):
+            on_change({
+                change.document.id: (
+                    None if change.type.name == "REMOVED" else change.document.to_dict()
+                )
+                for change in changes
+            })
+
+        return self.users.on_snapshot(callback)
+
+    def watch_availability(self, on_change):
+        """
+        Écoute temps réel des documents mensuels v2 : on_change({(email,
+        year, month): disponibilités, ou None si supprimé}).
+        """
+        def callback(snapshot, changes, read_time):
+            on_change({
+                (change.document.reference.parent.parent.id, *parse_period(change.document.id)): (
+                    None if change.type.name == "REMOVED"
+                    else read_month_document(change.document.to_dict())
+                )
+                for change in changes
+            })
+
+        return self.db.collection_group(SUBCOLLECTION).on_snapshot(callback)
+
+    def get_auth_uid(self, email):
+        try:
+            return auth.get_user_by_email(email).uid
+        except auth.UserNotFoundError:
+            return None
+
+    # ================= AVAILABILITÉS =================
+    def _month_ref(self, email, year, month):
+        return self.users.document(email).collection(SUBCOLLECTION).document(period(year, month))
+
+    def load_availability(self, email, year, month):
+        doc = self._month_ref(email, year, month).get()
+        if doc.exists:
+            return read_month_document(doc.to_dict())
+        if not self.legacy_reads:
+            return {}
+        user = self.get_user(email)
+        if user is None:
+            return {}
+        return user.get(legacy_field(year, month), {})
+
+    def load_all_availability(self, year, month, users=None):
+        # Une requête sur le groupe de collections (un petit document par
+        # personne ayant saisi le mois) ; v1 lu dans `users` si fourni.
+        query = self.db.collection_group(SUBCOLLECTION).where(
+            filter=FieldFilter("period", "==", period(year, month))
+        )
+        packed = {
+            doc.reference.parent.parent.id: read_month_document(doc.to_dict())
+            for doc in query.stream()
+        }
+        if users is None:
+            users = self.list_users()
+        field = legacy_field(year, month)
+        return {
+            email: packed[email] if email in packed
+            else info.get(field, {}) if self.legacy_reads
+            else {}
+            for email, info in users.items()
+        }
+
+    def save_availability(self, email, year, month, availability, changed=None):
+        user_ref = self.users.document(email)
+        month_ref = self._month_ref(email, year, month)
+
+        if changed is None:
+            batch = self.db.batch()
+            batch.set(month_ref, {
+                **month_document(year, month, availability),
+                "version": firestore.Increment(1),
+            }, merge=True)
+            batch.set(user_ref, {legacy_field(year, month): firestore.DELETE_FIELD}, merge=True)
+            batch.commit()
+            return
+
+        if not changed:
+            return
+
+        _save_availability_changes(
+            self.db.transaction(),
+            self.locks.document(f"{year}_{month}"),
+            user_ref,
+            month_ref,
+            year,
+            month,
+            {day: availability.get(day) for day in changed},
+        )
+
+    # ================= PLANNING LOCK =================
+    def is_locked(self, year, month):
+        return self.locks.document(f"{year}_{month}").get().exists
+
+    def lock_planning(self, year, month, planning_data):
+        self.locks.document(f"{year}_{month}").set({"locked": True})
+        self.plannings.document(f"{year}_{month}").set(planning_data)
+
+    def save_planning(self, year, month, planning_data):
+        self.plannings.document(f"{year}_{month}").set(planning_data)
+
+    def load_planning(self, year, month):
+        doc = self.plannings.document(f"{year}_{month}").get()
+        return doc.to_dict() if doc.exists else None
+
+
+@firestore.transactional
+def _save_availability_changes(transaction, lock_ref, user_ref, month_ref, year, month, changes):
+    # changes : {jour: bool, ou None = jour effacé}
+    if lock_ref.get(transaction=transaction).exists:
+        raise PlanningLockedError("Le planning de ce mois est verrouillé")
+
+    doc = month_ref.get(transaction=transaction)
+    if doc.exists:
+        current = read_month_document(doc.to_dict())
+        version = doc.get("version") or 0
+    else:
+        # Premier enregistrement v2 du mois : on part du champ v1
+        user = user_ref.get(transaction=transaction)
+        current = dict(user.to_dict().get(legacy_field(year, month), {})) if user.exists else {}
+        version = 0
+
+    for day, value in changes.items():
+        if value is None:
+            current.pop(day, None)
+        else:
+            current[day] = value
+
+    transaction.set(month_ref, month_document(year, month, current, version + 1))
+    if not doc.exists:
+        transaction.set(user_ref, {legacy_field(year, month): firestore.DELETE_FIELD}, merge=True)
@@ -0,0 +1,113 @@
+"""
+Migration des disponibilités Firestore vers le format compact (v2).
+
+Chaque champ availability_{année}_{mois} des documents utilisateurs devient
+un document users/{email}/availability/{année}_{mois} (cf.
+storage.packed_availability), puis le champ est supprimé.
+
+    python -m storage.migrate --dry-run       # bilan, aucune écriture
+    python -m storage.migrate                 # migration
+    python -m storage.migrate --keep-legacy   # v2 écrit, champs v1 gardés
+
+Rejouable : un mois déjà présent en v2 (écrit par l'application depuis)
+n'est pas réécrit, seul son champ v1 est supprimé. Une personne par
+écriture groupée : un conflit n'affecte qu'elle, elle sera reprise au
+passage suivant. Une fois la migration terminée, désactiver les lectures
+v1 ($PLANNING_LEGACY_AVAILABILITY=0).
+"""
+
+import json
+from dataclasses import dataclass, field
+
+from storage.packed_availability import (
+    LEGACY_PREFIX,
+    SUBCOLLECTION,
+    month_document,
+    parse_period,
+)
+
+
+@dataclass
+class MigrationReport:
+    users: int = 0
+    months: int = 0            # mois convertis
+    already_packed: int = 0    # mois déjà en v2 (champ v1 seulement supprimé)
+    bytes_before: int = 0      # taille (JSON) des champs v1
+    bytes_after: int = 0       # taille (JSON) des documents v2
+    errors: list = field(default_factory=list)  # [(email, message)]
+
+
+def migrate_users(db, *, dry_run=False, keep_legacy=False) -> MigrationReport:
+    """Convertit toute la collection users ; retourne le bilan."""
+    from firebase_admin import firestore
+
+    report = MigrationReport()
+
+    for snapshot in db.collection("users").stream():
+        doc = snapshot.to_dict()
+        legacy = {k: v for k, v in doc.items() if k.startswith(LEGACY_PREFIX)}
+        report.users += 1
+        if not legacy:
+            continue
+
+        user_ref = snapshot.reference
+        months_ref = user_ref.collection(SUBCOLLECTION)
+        existing = {d.id for d in months_ref.select(["period"]).stream()}
+
+        batch = db.batch()
+        try:
+            for name, availability in legacy.items():
+                year, month = parse_period(name)
+                packed_id = f"{year}_{month}"
+                if packed_id in existing:
+                    report.already_packed += 1
+                    continue
+
+                packed = month_document(year, month, availability)
+                report.bytes_before += len(json.dumps({name: availability}))
+                report.bytes_after += len(json.dumps(packed))
+                report.months += 1
+                # create : échoue si l'application a écrit ce mois entre-temps
+                batch.create(months_ref.document(packed_id), packed)
+
+            if not keep_legacy:
+                batch.update(user_ref, {name: firestore.DELETE_FIELD for name in legacy})
+            if not dry_run:
+                batch.commit()
+        except Exception as e:  # mois invalide, conflit : personne reprise au passage suivant
+            report.errors.append((snapshot.id, str(e)))
+
+    return report
+
+
+# --------------------------------------------------------------
+# Ligne de commande
+# --------------------------------------------------------------
+def main(argv=None):
+    import argparse
+
+    from storage.firestore_backend import FirestoreBackend
+
+    parser = argparse.ArgumentParser(description="Migration des disponibilités vers le format compact")
+    parser.add_argument("--dry-run", action="store_true", help="bilan seulement, aucune écriture")
+    parser.add_argument("--keep-legacy", action="store_true", help="ne pas supprimer les champs v1")
+    args = parser.parse_args(argv)
+
+    report = migrate_users(
+        FirestoreBackend().db, dry_run=args.dry_run, keep_legacy=args.keep_legacy
+    )
+
+    print(
+        f"{report.users} utilisateurs, {report.months} mois convertis, "
+        f"{report.already_packed} déjà au format compact"
+        + (" (simulation)" if args.dry_run else "")
+    )
+    print(f"Disponibilités : {report.bytes_before / 1024:.1f} Ko → {report.bytes_after / 1024:.1f} Ko")
+    for email, message in report.errors:
+        print("⚠️", email, ":", message)
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Format compact (v2) des disponibilités mensuelles Firestore.
+
+v1 (historique) : un champ availability_{année}_{mois} = {"AAAA-MM-JJ": bool}
+dans le document utilisateur, qui grossit d'un mois à l'autre et que
+chaque lecture du profil (is_admin, get_user…) télécharge en entier.
+
+v2 : un document par mois, users/{email}/availability/{année}_{mois} :
+    {"format": 2, "period": "2026_3", "year": 2026, "month": 3,
+     "available": <bits>, "unavailable": <bits>, "version": <n° d'écriture>}
+bit i = jour i + 1 du mois ; un jour sans bit n'est pas renseigné.
+
+Transition : les lecteurs préfèrent le document v2 et retombent sur le
+champ v1 ; les écritures produisent du v2 et suppriment le champ v1 du
+mois. storage.migrate convertit le reste en une passe.
+"""
+
+import calendar
+import datetime as dt
+
+FORMAT = 2
+SUBCOLLECTION = "availability"
+LEGACY_PREFIX = "availability_"
+
+
+def period(year: int, month: int) -> str:
+    """Identifiant du document v2 (et valeur du champ "period")."""
+    return f"{year}_{month}"
+
+
+def legacy_field(year: int, month: int) -> str:
+    return f"{LEGACY_PREFIX}{year}_{month}"
+
+
+def parse_period(value: str) -> tuple:
+    """"2026_3" ou "availability_2026_3" → (2026, 3)."""
+    year, month = value.removeprefix(LEGACY_PREFIX).split("_")
+    return int(year), int(month)
+
+
+def encode_month(year: int, month: int, availability: dict) -> tuple:
+    """{"AAAA-MM-JJ": bool} → (bits dispo, bits indispo)."""
+    available = unavailable = 0
+    for day, value in availability.items():
+        date = dt.date.fromisoformat(day)
+        if (date.year, date.month) != (year, month):
+            raise ValueError(f"{day} hors de {month:02d}/{year}")
+        if value:
+            available |= 1 << (date.day - 1)
+        else:
+            unavailable |= 1 << (date.day - 1)
+    return available, unavailable
+
+
+def decode_month(year: int, month: int, available: int, unavailable: int) -> dict:
+    """(bits dispo, bits indispo) → {"AAAA-MM-JJ": bool}, jours dans l'ordre."""
+    result = {}
+    for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        bit = 1 << (day - 1)
+        if available & bit:
+            result[f"{year}-{month:02d}-{day:02d}"] = True
+        elif unavailable & bit:
+            result[f"{year}-{month:02d}-{day:02d}"] = False
+    return result
+
+
+def month_document(year: int, month: int, availability: dict, version: int = 1) -> dict:
+    available, unavailable = encode_month(year, month, availability)
+    return {
+        "format": FORMAT,
+        "period": period(year, month),
+        "year": year,
+        "month": month,
+        "available": available,
+        "unavailable": unavailable,
+        "version": version,
+    }
+
+
+def read_month_document(doc: dict) -> dict:
+    """Document v2 → {"AAAA-MM-JJ": bool}."""
+    if doc.get("format") != FORMAT:
+        raise ValueError(f"Format de disponibilités inconnu : {doc.get('format')!r}")
+    return decode_month(doc["year"], doc["month"], doc["available"], doc["unavailable"])
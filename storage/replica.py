@@ -0,0 +1,221 @@
+"""
+Réplica locale (par processus) des utilisateurs et de leurs disponibilités.
+
+Chargée une fois, puis tenue à jour :
+- Firestore : écoute temps réel de la collection users et des documents
+              mensuels de disponibilités (on_snapshot) ;
+- SQLite    : interrogation incrémentale du journal `changes` toutes les
+              `poll_interval` secondes.
+
+Les lectures (solveur, UI) sont servies depuis la mémoire ; staleness()
+indique l'âge de la dernière synchronisation confirmée. Les dictionnaires
+renvoyés sont partagés : ne pas les modifier.
+"""
+
+import threading
+import time
+
+from storage.packed_availability import LEGACY_PREFIX, parse_period
+
+
+class AvailabilityReplica:
+    def __init__(self, backend, poll_interval=2.0, ready_timeout=30.0):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.ready_timeout = ready_timeout
+
+        self._lock = threading.Lock()
+        self._users = {}    # {email: document}
+        self._months = {}   # {email: {(year, month): {"AAAA-MM-JJ": bool}}}
+        self._legacy = {}   # idem, champs v1 des documents utilisateurs
+        self._seq = 0
+        self._last_sync = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._waiting = set()  # écoutes sans premier lot reçu
+        self._watches = []
+        self._thread = None
+
+        self.events = 0
+        self.last_error = None
+
+    @property
+    def mode(self):
+        return "listener" if hasattr(self.backend, "watch_users") else "polling"
+
+    # ================= CYCLE DE VIE =================
+    def start(self):
+        if self._ready.is_set() or self._watches or self._thread:
+            return self
+
+        if self.mode == "listener":
+            self._waiting = {"users"}
+            if hasattr(self.backend, "watch_availability"):
+                self._waiting.add("availability")
+                self._watches.append(self.backend.watch_availability(self._on_month_snapshot))
+            self._watches.append(self.backend.watch_users(self._on_snapshot))
+        elif hasattr(self.backend, "changes_since"):
+            self._initial_load()
+            self._thread = threading.Thread(
+                target=self._poll_loop, name="availability-replica", daemon=True
+            )
+            self._thread.start()
+        else:
+            raise TypeError(
+                f"{type(self.backend).__name__} : ni écoute temps réel ni journal de modifications"
+            )
+
+        if not self._ready.wait(self.ready_timeout):
+            raise TimeoutError("Réplica : chargement initial trop long")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for watch in self._watches:
+            watch.unsubscribe()
+
+    # ================= LECTURES =================
+    def users(self):
+        """{email: document} (comme list_users)."""
+        with self._lock:
+            return dict(self._users)
+
+    def availability(self, year, month, users=None):
+        """{email: dispos du mois} (comme load_all_availability)."""
+        with self._lock:
+            emails = self._users if users is None else users
+            return {
+                email: self._months.get(email, {}).get(
+                    (year, month), self._legacy.get(email, {}).get((year, month), {})
+                )
+                for email in emails
+            }
+
+    def staleness(self):
+        """
+        Secondes depuis la dernière synchronisation confirmée (0 tant que
+        l'écoute temps réel est active ; None avant le chargement initial).
+        """
+        if self._last_sync is None:
+            return None
+        if self._watches and all(watch.is_active for watch in self._watches):
+            return 0.0
+        return time.monotonic() - self._last_sync
+
+    # ================= ÉCRITURES LOCALES =================
+    def apply(self, email, year, month, availability, changed=None):
+        """
+        Reporte immédiatement une écriture de ce processus (lecture de ses
+        propres écritures sans attendre l'écoute ou l'interrogation).
+        """
+        with self._lock:
+            months = dict(self._months.get(email, {}))
+            if changed is None:
+                current = dict(availability)
+            else:
+                current = dict(months.get(
+                    (year, month), self._legacy.get(email, {}).get((year, month), {})
+                ))
+                for day in changed:
+                    if day in availability:
+                        current[day] = availability[day]
+                    else:
+                        current.pop(day, None)
+            months[(year, month)] = current
+            self._months[email] = months
+
+    def refresh(self):
+        """Interroge le journal maintenant (mode polling)."""
+        if self.mode == "polling":
+            self._poll()
+
+    # ================= FIRESTORE (écoute) =================
+    def _on_snapshot(self, docs):
+        with self._lock:
+            for email, doc in docs.items():
+                if doc is None:
+                    self._users.pop(email, None)
+                    self._legacy.pop(email, None)
+                    continue
+                self._users[email] = doc
+                self._legacy[email] = {
+                    parse_period(field): value
+                    for field, value in doc.items()
+                    if field.startswith(LEGACY_PREFIX)
+                }
+            self.events += len(docs)
+            self._last_sync = time.monotonic()
+        self._synced("users")
+
+    def _on_month_snapshot(self, changes):
+        with self._lock:
+            for (email, year, month), availability in changes.items():
+                months = dict(self._months.get(email, {}))
+                if availability is None:
+                    months.pop((year, month), None)
+                else:
+                    months[(year, month)] = availability
+                self._months[email] = months
+            self.events += len(changes)
+            self._last_sync = time.monotonic()
+        self._synced("availability")
+
+    def _synced(self, name):
+        # Prête quand chaque écoute a livré son premier lot
+        with self._lock:
+            self._waiting.discard(name)
+            if not self._waiting:
+                self._ready.set()
+
+    # ================= SQLITE (journal) =================
+    def _initial_load(self):
+        seq = self.backend.last_change()
+        users = self.backend.list_users()
+        months = {email: {} for email in users}
+        for year, month in self.backend.availability_months():
+            for email, avail in self.backend.load_all_availability(year, month, users=users).items():
+                if avail:
+                    months[email][(year, month)] = avail
+
+        with self._lock:
+            self._users, self._months, self._seq = users, months, seq
+            self._last_sync = time.monotonic()
+        self._ready.set()
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._poll()
+            except Exception as e:  # la réplica vieillit, staleness() le montre
+                self.last_error = e
+
+    def _poll(self):
+        seq, keys = self.backend.changes_since(self._seq)
+
+        profiles = {}
+        by_month = {}
+        for email, year, month in keys:
+            if year == 0:
+                profiles[email] = self.backend.get_user(email)
+            else:
+                by_month.setdefault((year, month), []).append(email)
+        loaded = {
+            ym: self.backend.load_all_availability(*ym, users=emails)
+            for ym, emails in by_month.items()
+        }
+
+        with self._lock:
+            for email, doc in profiles.items():
+                if doc is None:
+                    self._users.pop(email, None)
+                    self._months.pop(email, None)
+                else:
+                    self._users[email] = doc
+            for ym, month_availability in loaded.items():
+                for email, avail in month_availability.items():
+                    months = dict(self._months.get(email, {}))
+                    months[ym] = avail
+                    self._months[email] = months
+            self._seq = seq
+            self.events += len(keys)
+            self._last_sync = time.monotonic()
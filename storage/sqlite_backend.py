@@ -0,0 +1,258 @@
+import json
+import sqlite3
+import threading
+import time
+
+from storage.base import StorageBackend, PlanningLockedError
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    data  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS availability (
+    email TEXT    NOT NULL,
+    year  INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    day   TEXT    NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (email, year, month, day)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS availability_by_month
+    ON availability (year, month);
+
+CREATE TABLE IF NOT EXISTS planning_locks (
+    year  INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    PRIMARY KEY (year, month)
+);
+
+-- Journal des modifications (réplicas : interrogation incrémentale).
+-- year = month = 0 : profil utilisateur.
+CREATE TABLE IF NOT EXISTS changes (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    email      TEXT    NOT NULL,
+    year       INTEGER NOT NULL,
+    month      INTEGER NOT NULL,
+    updated_at REAL    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS plannings (
+    year  INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    data  TEXT    NOT NULL,
+    PRIMARY KEY (year, month)
+);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Stand-in local de Firestore (hors ligne, rejouable à l'échelle) :
+    une ligne par (utilisateur, année, mois, jour), indexée par mois.
+    ":memory:" pour une base éphémère.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # ================= USERS =================
+    def get_user(self, email):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data FROM users WHERE email = ?", (email,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_users(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT email, data FROM users").fetchall()
+        return {email: json.loads(data) for email, data in rows}
+
+    def save_user(self, email, data):
+        with self._lock, self.conn:
+            current = self.get_user(email) or {}
+            current.update(data)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO users (email, data) VALUES (?, ?)",
+                (email, json.dumps(current)),
+            )
+            self._log_changes([(email, 0, 0)])
+
+    def get_auth_uid(self, email):
+        return email if self.get_user(email) is not None else None
+
+    # ================= AVAILABILITÉS =================
+    def load_availability(self, email, year, month):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT day, value FROM availability "
+                "WHERE email = ? AND year = ? AND month = ?",
+                (email, year, month),
+            ).fetchall()
+        return {day: bool(value) for day, value in rows}
+
+    def load_all_availability(self, year, month, users=None):
+        with self._lock:
+            if users is None:
+                users = self.conn.execute("SELECT email FROM users").fetchall()
+                users = [email for (email,) in users]
+            rows = self.conn.execute(
+                "SELECT email, day, value FROM availability "
+                "WHERE year = ? AND month = ?",
+                (year, month),
+            ).fetchall()
+
+        result = {email: {} for email in users}
+        for email, day, value in rows:
+            if email in result:
+                result[email][day] = bool(value)
+        return result
+
+    def save_availability(self, email, year, month, availability, changed=None):
+        with self._lock, self.conn:
+            if changed is None:
+                self.conn.execute(
+                    "DELETE FROM availability "
+                    "WHERE email = ? AND year = ? AND month = ?",
+                    (email, year, month),
+                )
+                changed = list(availability)
+            elif self._is_locked(year, month):
+                raise PlanningLockedError("Le planning de ce mois est verrouillé")
+
+            upserts = [
+                (email, year, month, day, int(availability[day]))
+                for day in changed if day in availability
+            ]
+            deletes = [
+                (email, year, month, day)
+                for day in changed if day not in availability
+            ]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO availability "
+                "(email, year, month, day, value) VALUES (?, ?, ?, ?, ?)",
+                upserts,
+            )
+            self.conn.executemany(
+                "DELETE FROM availability "
+                "WHERE email = ? AND year = ? AND month = ? AND day = ?",
+                deletes,
+            )
+            self._log_changes([(email, year, month)])
+
+    def availability_months(self):
+        """[(year, month)] ayant au moins une disponibilité."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT DISTINCT year, month FROM availability ORDER BY year, month"
+            ).fetchall()
+
+    # ================= JOURNAL =================
+    def changes_since(self, seq=0):
+        """
+        (dernier seq, [(email, year, month)]) modifiés après `seq`, sans
+        doublon ; (email, 0, 0) = profil utilisateur.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT seq, email, year, month FROM changes WHERE seq > ? ORDER BY seq",
+                (seq,),
+            ).fetchall()
+        if not rows:
+            return seq, []
+        return rows[-1][0], list(dict.fromkeys(row[1:] for row in rows))
+
+    def last_change(self):
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(seq) FROM changes").fetchone()
+        return row[0] or 0
+
+    def _log_changes(self, keys):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT INTO changes (email, year, month, updated_at) VALUES (?, ?, ?, ?)",
+            [(*key, now) for key in keys],
+        )
+
+    # ================= PLANNING LOCK =================
+    def is_locked(self, year, month):
+        with self._lock:
+            return self._is_locked(year, month)
+
+    def _is_locked(self, year, month):
+        return self.conn.execute(
+            "SELECT 1 FROM planning_locks WHERE year = ? AND month = ?",
+            (year, month),
+        ).fetchone() is not None
+
+    def lock_planning(self, year, month, planning_data):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO planning_locks (year, month) VALUES (?, ?)",
+                (year, month),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO plannings (year, month, data) VALUES (?, ?, ?)",
+                (year, month, json.dumps(planning_data, default=str)),
+            )
+
+    def save_planning(self, year, month, planning_data):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO plannings (year, month, data) VALUES (?, ?, ?)",
+                (year, month, json.dumps(planning_data, default=str)),
+            )
+
+    def load_planning(self, year, month):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data FROM plannings WHERE year = ? AND month = ?",
+                (year, month),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # ================= IMPORT =================
+    def import_users(self, users):
+        """
+        Rejoue un export de la collection `users` ({email: document}, au
+        format Firestore : profil + champs availability_{year}_{month}).
+        """
+        profiles, days, changed = [], [], []
+        for email, doc in users.items():
+            profile = {}
+            changed.append((email, 0, 0))
+            for key, value in doc.items():
+                if key.startswith("availability_"):
+                    _, year, month = key.split("_")
+                    changed.append((email, int(year), int(month)))
+                    days.extend(
+                        (email, int(year), int(month), day, int(v))
+                        for day, v in value.items()
+                    )
+                else:
+                    profile[key] = value
+            profiles.append((email, json.dumps(profile)))
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO users (email, data) VALUES (?, ?)",
+                profiles,
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO availability "
+                "(email, year, month, day, value) VALUES (?, ?, ?, ?, ?)",
+                days,
+            )
+            self._log_changes(changed)